@@ -3,7 +3,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, InvalidSessionIdException, TimeoutException
-from bs4 import BeautifulSoup
 import time
 import logging
 import os
@@ -11,6 +10,7 @@ import os
 import config
 import log_monitor
 import scheduler
+import signal_engine
 
 # Configure logging (console only - no log.log file)
 logging.basicConfig(
@@ -20,18 +20,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Spribe game iframe: match by src (loading attribute may vary by site)
+IFRAME_SELECTOR = "iframe[loading='eager'][src*='spribe'], iframe[loading='eager'][src*='launch.spribegaming.com']"
+PAYOUTS_SELECTOR = "div.payouts-wrapper div.payout.ng-star-inserted"
+DROPDOWN_TOGGLE_SELECTOR = ".button-block .dropdown-toggle"
+IFRAME_COND = EC.presence_of_element_located((By.CSS_SELECTOR, IFRAME_SELECTOR))
+DROPDOWN_TOGGLE_COND = EC.element_to_be_clickable((By.CSS_SELECTOR, DROPDOWN_TOGGLE_SELECTOR))
+# Seconds to look for the game iframe before assuming the saved profile is logged out
+LOGGED_IN_CHECK_TIMEOUT = 5
+# Read payout texts in the page instead of serializing and re-parsing the whole DOM
+PAYOUTS_JS = (
+    "return Array.from(document.querySelectorAll(arguments[0]))"
+    ".map(e => e.textContent.trim());"
+)
+FIRST_PAYOUT_JS = (
+    "const e = document.querySelector(arguments[0]);"
+    "return e ? e.textContent.trim() : null;"
+)
+# Max seconds to wait in the iframe for a new round before re-entering the loop
+NEW_ROUND_WAIT_TIMEOUT = 30
+# Poll interval for the new-round wait: reset on every new round, backed off while the game is idle
+NEW_ROUND_POLL_MIN = 0.5
+NEW_ROUND_POLL_MAX = 5.0
+NEW_ROUND_POLL_BACKOFF = 1.3
+
+# Images, fonts and media are never read by the scraper; blocking them shrinks the DOM and speeds navigation
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.webp", "*.gif", "*.svg",
+    "*.woff", "*.woff2", "*.ttf",
+    "*.mp4", "*.webm", "*.mp3",
+]
+
+# urllib3 pool size for the WebDriver command connection (Selenium defaults to 1)
+WEBDRIVER_POOL_MAXSIZE = 20
+
+
+def widen_connection_pool(driver):
+    """Raise the WebDriver HTTP pool size so bursts of commands reuse connections instead of dropping them."""
+    try:
+        pool_manager = driver.command_executor._conn
+        pool_manager.connection_pool_kw["maxsize"] = WEBDRIVER_POOL_MAXSIZE
+        # Existing pools keep their old size; clear them so the next request builds one with the new maxsize
+        pool_manager.clear()
+    except Exception as e:
+        logger.debug(f"Could not resize WebDriver connection pool: {e}")
+
+
+def block_heavy_resources(driver):
+    """Block images/fonts/media and downloads via CDP. Failures are non-fatal."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "deny"})
+    except Exception as e:
+        logger.debug(f"Could not block heavy resources via CDP: {e}")
+
 
 def input_text(element, text):
-    for char in text:
-        element.send_keys(char)
-        time.sleep(0.1)
+    element.send_keys(text)
+
+
+def is_logged_in(driver):
+    """True if the game iframe loads without logging in (cookies restored from the browser profile)."""
+    try:
+        WebDriverWait(driver, LOGGED_IN_CHECK_TIMEOUT).until(IFRAME_COND)
+        return True
+    except TimeoutException:
+        return False
 
 
 def login(driver):
     try:
         logger.info(f"Navigating to {config.LOGIN_URL}")
         driver.get(config.LOGIN_URL)
-        driver.find_element(By.CSS_SELECTOR, "button[type='button'].bg-button-primary.h-14").click()
+        if is_logged_in(driver):
+            logger.info("Session restored from browser profile, skipping login")
+            return
+        WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='button'].bg-button-primary.h-14"))
+        ).click()
         # Wait for login form; use name attributes (email / password) from the form
         username_input = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='email']"))
@@ -44,7 +111,6 @@ def login(driver):
         driver.find_element(By.CSS_SELECTOR, "button[type='submit'].bg-button-primary").click()
         logger.info("Logged in successfully")
         # Wait for promo modal's button row, then click Close (bg-button-secondary in that row only)
-        time.sleep(1)
         try:
             close_btn = WebDriverWait(driver, 15).until(
                 EC.element_to_be_clickable((
@@ -79,29 +145,25 @@ def run_payout_script():
             driver = Driver(
                 headless=True,
                 undetectable=True,
-                incognito=True,
+                user_data_dir=config.BROWSER_PROFILE_DIR,
             )
+            widen_connection_pool(driver)
+            block_heavy_resources(driver)
 
             login(driver)
-            logger.info(f"Navigating to {config.LOGIN_URL}")
-            driver.get(config.LOGIN_URL)
-            driver.find_element(By.CSS_SELECTOR, "button[type='button'].bg-button-primary").click()
-            logger.info("Logged in successfully")
 
             previous_payout_list = None
             iframe_logged = False
-            # Spribe game iframe: match by src (loading attribute may vary by site)
+            # Built once per driver and reused every iteration
+            wait = WebDriverWait(driver, 10)
+            poll_interval = NEW_ROUND_POLL_MIN
             while True:
                 try:
-                    iframe = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "iframe[loading='eager'][src*='spribe'], iframe[loading='eager'][src*='launch.spribegaming.com']"))
-                    )
+                    iframe = wait.until(IFRAME_COND)
                     driver.switch_to.frame(iframe)
                     
                     try:
-                        dropdown_toggle = WebDriverWait(driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, ".button-block .dropdown-toggle"))
-                        )
+                        dropdown_toggle = wait.until(DROPDOWN_TOGGLE_COND)
                         dropdown_toggle.click()
                         time.sleep(0.5)
                     except Exception:
@@ -111,28 +173,36 @@ def run_payout_script():
                         logger.info("Switched to game iframe")
                         iframe_logged = True
 
-                    soup = BeautifulSoup(driver.page_source, "html.parser")
-                    payouts_wrapper = soup.find("div", class_="payouts-wrapper")
-                    payouts = (
-                        payouts_wrapper.find_all("div", class_="payout ng-star-inserted")
-                        if payouts_wrapper
-                        else []
-                    )
+                    had_new = False
+                    # Peek at the newest payout first; only fetch the full list when it changed
+                    first_payout = driver.execute_script(FIRST_PAYOUT_JS, PAYOUTS_SELECTOR)
 
-                    if payouts:
-                        payout_amount_list = [p.text.strip() for p in payouts]
-                        previous_payout_list, had_new = log_monitor.process_payout_list(
-                            payout_amount_list, previous_payout_list
-                        )
-                        if had_new:
-                            logger.info(
-                                f"Found {len(payouts)} payouts | {payout_amount_list}"
-                            )
-                    else:
+                    if first_payout is None:
                         logger.warning(config.LOG_NO_PAYOUTS_MSG)
+                    elif not previous_payout_list or previous_payout_list[0] != first_payout:
+                        payout_amount_list = driver.execute_script(PAYOUTS_JS, PAYOUTS_SELECTOR)
+                        if payout_amount_list:
+                            previous_payout_list, had_new = log_monitor.process_payout_list(
+                                payout_amount_list, previous_payout_list
+                            )
+                            if had_new:
+                                logger.info(
+                                    f"Found {len(payout_amount_list)} payouts | {payout_amount_list}"
+                                )
+
+                    # Block until the newest payout changes instead of re-reading on a fixed interval
+                    if had_new:
+                        poll_interval = NEW_ROUND_POLL_MIN
+                    last_first_payout = first_payout
+                    try:
+                        WebDriverWait(driver, NEW_ROUND_WAIT_TIMEOUT, poll_frequency=poll_interval).until(
+                            lambda d: d.execute_script(FIRST_PAYOUT_JS, PAYOUTS_SELECTOR) != last_first_payout
+                        )
+                    except TimeoutException:
+                        # No round for a whole wait: the game is idle, poll less often
+                        poll_interval = min(poll_interval * NEW_ROUND_POLL_BACKOFF, NEW_ROUND_POLL_MAX)
 
                     driver.switch_to.default_content()
-                    time.sleep(0.5)
 
                 except TimeoutException:
                     logger.warning("Game iframe not found yet, retrying in 5s...")
@@ -177,6 +247,9 @@ logger.info("Script started (direct DB mode - no log file)")
 try:
     run_payout_script()
 finally:
+    # Let queued result messages go out before the shutdown summary
+    signal_engine.flush_telegram_queue()
+    signal_engine.flush_last_message_at()
     try:
         scheduler.post_shutdown_summary()
     except Exception as e:
@@ -14,11 +14,21 @@ LOG_NO_PAYOUTS_MSG = "No payouts found on the page"
 AVIATOR_USERNAME = os.environ.get("AVIATOR_USERNAME", "")
 AVIATOR_PASSWORD = os.environ.get("AVIATOR_PASSWORD", "")
 LOGIN_URL = os.environ.get("AVIATOR_LOGIN_URL", "https://zamba.bet/games/spribe/aviator")
+# Persistent Chrome profile so login cookies survive browser restarts
+BROWSER_PROFILE_DIR = os.environ.get(
+    "AVIATOR_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chrome-profile"),
+)
 
 # MongoDB (log monitor)
 MONGODB_URI = os.environ.get("MONGODB_URI", "")
 MONGODB_DATABASE = os.environ.get("MONGODB_DATABASE", "zambabet")
 MONGODB_COLLECTION = os.environ.get("MONGODB_COLLECTION", "rounds")
+# Shared client (rounds, signal engine, scheduler). zlib is the stdlib fallback when zstd/snappy are not installed.
+MONGODB_MAX_POOL_SIZE = 20
+MONGODB_MIN_POOL_SIZE = 2
+MONGODB_COMPRESSORS = "zstd,snappy,zlib"
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = 3000
 
 # Signal Engine
 SEQUENCE_LENGTH = 3
@@ -35,6 +45,8 @@ MAX_INTERRUPT_RATE = 0.30          # Do not post cancel if interrupts already >=
 SIGNALS_COLLECTION = "signals"
 DAILY_STATS_COLLECTION = "daily_stats"
 ENGINE_STATE_COLLECTION = "engine_state"
+# Sequence counters (rounds _id)
+COUNTERS_COLLECTION = "counters"
 
 # Telegram - Primary Channel
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
@@ -2,15 +2,13 @@
 Log Monitor for aviator.py
 Monitors the log file and saves newly detected payouts to MongoDB
 """
-import ast
 import logging
 import os
 import re
 import time
-from datetime import datetime, timezone
-from decimal import Decimal
+from datetime import datetime, timedelta, timezone
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 
 import config
 import signal_engine
@@ -32,19 +30,38 @@ logger = logging.getLogger(__name__)
 # MongoDB connection
 mongo_client = None
 mongo_collection = None
+counters_collection = None
+
+ROUNDS_COUNTER_ID = "rounds"
+
+_PAYOUT_RE = re.compile(r"Found \d+ payouts \| (\[.*\])")
+# Matched against raw bytes so non-payout lines are skipped without decoding
+_PAYOUT_LINE_GATE_RE = re.compile(rb"Found \d+ payouts \| \[")
+# Strip trailing 'x'/'X' and thousand separators from multiplier strings
+_MULTIPLIER_STRIP_TABLE = str.maketrans("", "", "xX,")
 
 
 def init_mongodb():
     """Initialize MongoDB connection, signal engine, Telegram, and scheduler."""
-    global mongo_client, mongo_collection
+    global mongo_client, mongo_collection, counters_collection
     if not config.MONGODB_URI:
         logger.error("MONGODB_URI environment variable is not set. Exiting.")
         return False
     try:
-        mongo_client = MongoClient(config.MONGODB_URI)
+        mongo_client = MongoClient(
+            config.MONGODB_URI,
+            maxPoolSize=config.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=config.MONGODB_MIN_POOL_SIZE,
+            w=1,
+            retryWrites=True,
+            compressors=config.MONGODB_COMPRESSORS,
+            serverSelectionTimeoutMS=config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        )
         mongo_db = mongo_client[config.MONGODB_DATABASE]
         mongo_collection = mongo_db[config.MONGODB_COLLECTION]
+        counters_collection = mongo_db[config.COUNTERS_COLLECTION]
         logger.info(f"Connected to MongoDB: {config.MONGODB_DATABASE}.{config.MONGODB_COLLECTION}")
+        _seed_round_counter()
         
         # Initialize signal engine
         signal_engine.init(mongo_db)
@@ -73,20 +90,62 @@ def close_mongodb():
         mongo_client = None
 
 
-def convert_multiplier_to_decimal(multiplier_str):
-    """Convert multiplier string (e.g., '2.50x') to Decimal"""
+def _parse_multiplier(multiplier_str):
+    """Convert multiplier string (e.g., '2.50x') to float"""
     try:
-        # Strip trailing 'x'/'X' and normalize thousand/decimal separators.
-        # Some casinos format big multipliers as '1,640.11x' – Decimal cannot
+        # Strip trailing 'x'/'X' and thousand separators.
+        # Some casinos format big multipliers as '1,640.11x' – float cannot
         # parse the comma, so we remove any thousand separators.
-        multiplier_value = re.sub(r'[xX]', '', multiplier_str.strip())
-        multiplier_value = multiplier_value.replace(',', '')
-        return Decimal(multiplier_value)
-    except Exception as e:
+        return float(multiplier_str.translate(_MULTIPLIER_STRIP_TABLE))
+    except (AttributeError, ValueError) as e:
         logger.error(f"Error converting multiplier '{multiplier_str}': {e}")
         return None
 
 
+def _seed_round_counter():
+    """
+    Make sure the rounds counter is at least the current max integer _id.
+    Runs once at startup so existing collections keep their sequence.
+    """
+    max_id = None
+    try:
+        for doc in mongo_collection.find({}, projection={"_id": 1}).sort("_id", -1).limit(100):
+            doc_id = doc.get("_id")
+            if isinstance(doc_id, int):
+                max_id = doc_id
+                break
+    except Exception as e:
+        logger.debug(f"Error finding max integer ID: {e}")
+
+    if max_id is None:
+        if mongo_collection.count_documents({}) == 0:
+            max_id = 0
+        else:
+            logger.warning(
+                "Collection contains ObjectIds. Starting integer IDs from 1000000. "
+                "Existing ObjectId documents will be ignored for sequence detection."
+            )
+            max_id = 999999
+
+    # $max never moves the counter backwards if it is already ahead
+    counters_collection.update_one(
+        {"_id": ROUNDS_COUNTER_ID},
+        {"$max": {"seq": max_id}},
+        upsert=True,
+    )
+
+
+def _next_round_id(count=1):
+    """Atomically reserve `count` sequential round _ids. Returns the first one."""
+    counter = counters_collection.find_one_and_update(
+        {"_id": ROUNDS_COUNTER_ID},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return counter["seq"] - count + 1
+
+
 def save_round_to_db(multiplier_str, round_timestamp):
     """Save a round to MongoDB database with sequential integer _id"""
     global mongo_collection
@@ -96,36 +155,15 @@ def save_round_to_db(multiplier_str, round_timestamp):
         return False
 
     try:
-        multiplier = convert_multiplier_to_decimal(multiplier_str)
+        multiplier = _parse_multiplier(multiplier_str)
         if multiplier is None:
             return False
 
-        max_round = None
-        try:
-            for doc in mongo_collection.find().sort("_id", -1).limit(100):
-                doc_id = doc.get("_id")
-                if isinstance(doc_id, int):
-                    max_round = doc
-                    break
-        except Exception as e:
-            logger.debug(f"Error finding max integer ID: {e}")
-
-        if max_round and isinstance(max_round.get("_id"), int):
-            next_id = max_round["_id"] + 1
-        else:
-            total_count = mongo_collection.count_documents({})
-            if total_count == 0:
-                next_id = 1
-            else:
-                logger.warning(
-                    "Collection contains ObjectIds. Starting integer IDs from 1000000. "
-                    "Existing ObjectId documents will be ignored for sequence detection."
-                )
-                next_id = 1000000
+        next_id = _next_round_id()
 
         document = {
             "_id": next_id,
-            "multiplier": float(multiplier),
+            "multiplier": multiplier,
             "timestamp": round_timestamp,
             "created_at": datetime.now(timezone.utc)
         }
@@ -138,6 +176,59 @@ def save_round_to_db(multiplier_str, round_timestamp):
         return None
 
 
+def save_rounds_to_db(multiplier_strs, round_timestamp):
+    """
+    Save several rounds (oldest first) with one id reservation and one insert_many.
+    Unparseable multipliers are skipped. Returns the list of saved documents.
+    """
+    if mongo_collection is None:
+        logger.warning("MongoDB collection not initialized. Skipping database save.")
+        return []
+
+    try:
+        multipliers = [_parse_multiplier(s) for s in multiplier_strs]
+        multipliers = [m for m in multipliers if m is not None]
+        if not multipliers:
+            return []
+
+        first_id = _next_round_id(len(multipliers))
+        now = datetime.now(timezone.utc)
+        # One scrape reveals the whole burst; 1 µs apart keeps each round's timestamp distinct and in _id order
+        documents = [
+            {
+                "_id": first_id + i,
+                "multiplier": multiplier,
+                "timestamp": round_timestamp + timedelta(microseconds=i),
+                "created_at": now,
+            }
+            for i, multiplier in enumerate(multipliers)
+        ]
+
+        mongo_collection.insert_many(documents, ordered=False)
+        logger.info(
+            f"✅ Saved {len(documents)} rounds to DB: _id={first_id}..{first_id + len(documents) - 1}, "
+            f"multipliers={[d['multiplier'] for d in documents]}"
+        )
+        return documents
+    except Exception as e:
+        logger.error(f"Error saving rounds to database: {e}")
+        return []
+
+
+def _split_payout_list(payout_list_str):
+    """
+    Split the repr of a list of payout strings (e.g. "['2.50x', '1.80x']") into its items.
+    The log line is written by aviator.py itself, so the format is fixed.
+    """
+    inner = payout_list_str[1:-1].strip()
+    if not inner:
+        return []
+    if inner[0] not in "'\"" or inner[-1] != inner[0]:
+        raise ValueError(f"Unexpected payout list format: {payout_list_str}")
+    quote = inner[0]
+    return inner[1:-1].split(f"{quote}, {quote}")
+
+
 def parse_payout_from_log(line):
     """
     Parse payout information from log line.
@@ -147,13 +238,10 @@ def parse_payout_from_log(line):
     try:
         if config.LOG_PAYOUTS_FOUND_PREFIX not in line or config.LOG_PAYOUTS_FOUND_SEP not in line:
             return None
-        match = re.search(r"Found \d+ payouts \| (\[.*\])", line)
+        match = _PAYOUT_RE.search(line)
         if match:
-            payout_list_str = match.group(1)
-            payout_list = ast.literal_eval(payout_list_str)
-            if isinstance(payout_list, list):
-                return payout_list
-    except (ValueError, SyntaxError) as e:
+            return _split_payout_list(match.group(1))
+    except ValueError as e:
         logger.debug(f"Error parsing payout from log line: {e}")
     return None
 
@@ -193,15 +281,12 @@ def process_payout_list(payout_list, previous_payout_list):
                 previous_payout_list = payout_list.copy()
             else:
                 logger.info(f"🆕 {len(new_values)} NEW PAYOUTS DETECTED | New Values: {new_values}")
-                for multiplier_str in reversed(new_values):
-                    round_timestamp = datetime.now(timezone.utc)
-                    logger.info(f"   Saving payout: {multiplier_str}")
-                    round_doc = save_round_to_db(multiplier_str, round_timestamp)
-                    if round_doc:
-                        signal_engine.on_new_round(round_doc)
-                    time.sleep(0.1)
+                round_timestamp = datetime.now(timezone.utc)
+                round_docs = save_rounds_to_db(list(reversed(new_values)), round_timestamp)
+                for round_doc in round_docs:
+                    signal_engine.on_new_round(round_doc)
                 previous_payout_list = payout_list.copy()
-                logger.info(f"✅ All {len(new_values)} new payouts saved to database")
+                logger.info(f"✅ {len(round_docs)} of {len(new_values)} new payouts saved to database")
             return previous_payout_list, True
         return previous_payout_list, False
     else:
@@ -211,10 +296,8 @@ def process_payout_list(payout_list, previous_payout_list):
 
 
 def _process_lines(new_lines, previous_payout_list):
-    """Process new log lines and return updated previous_payout_list."""
+    """Process new payout log lines (already filtered by _PAYOUT_LINE_GATE_RE) and return updated previous_payout_list."""
     for line in new_lines:
-        if config.LOG_PAYOUTS_FOUND_PREFIX not in line or "payouts" not in line:
-            continue
         payout_list = parse_payout_from_log(line)
         if not payout_list:
             continue
@@ -271,12 +354,14 @@ def monitor_log_file():
                             buffer += chunk
                             while b'\n' in buffer:
                                 line_bytes, buffer = buffer.split(b'\n', 1)
+                                if not _PAYOUT_LINE_GATE_RE.search(line_bytes):
+                                    continue
                                 try:
                                     decoded_line = line_bytes.decode('utf-8', errors='ignore')
                                     new_lines.append(decoded_line)
                                 except Exception:
                                     continue
-                        if buffer:
+                        if buffer and _PAYOUT_LINE_GATE_RE.search(buffer):
                             try:
                                 decoded_line = buffer.decode('utf-8', errors='ignore')
                                 if decoded_line.strip():
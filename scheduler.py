@@ -1,14 +1,19 @@
 """
-Scheduler: scheduled Telegram messages (daily opener, hourly scoreboard, recaps, etc.)
+Scheduler: scheduled Telegram messages (daily opener, session summary, recaps, etc.)
 All times in BRT (America/Sao_Paulo timezone).
 """
 import logging
 import random
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-import pytz
 
 import config
 import signal_engine
@@ -16,10 +21,34 @@ import telegram_service
 
 logger = logging.getLogger(__name__)
 
-BRT = pytz.timezone("America/Sao_Paulo")
+BRT = ZoneInfo("America/Sao_Paulo")
 _scheduler = None
 _db = None
 
+RESULT_EMOJIS = {
+    signal_engine.STATUS_WON: signal_engine.RESULT_EMOJI_WON,
+    signal_engine.STATUS_LOST: signal_engine.RESULT_EMOJI_LOST,
+}
+WEEKDAY_NAMES = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
+
+# Index backing the resolved-signals-by-date queries (recaps, session summary)
+SIGNALS_CREATED_STATUS_INDEX = [("created_at", 1), ("status", 1)]
+
+# daily_stats cache: date_str -> doc, for past BRT days only. A doc fetched after its day ended never changes
+# again; today's doc is always read fresh since signal_engine keeps writing it.
+_daily_stats_cache = {}
+
+# Pattern monitoring is event-driven (signal_engine callback); debounce to the old 12-min cadence
+PATTERN_MONITORING_MIN_INTERVAL_SEC = 12 * 60
+_last_pattern_monitoring_at = None
+# Called from both the APScheduler pool and signal_engine's Telegram worker
+_pattern_monitoring_lock = threading.Lock()
+
+# (date_str, wins, losses, signal_engine daily_stats revision, taken_at monotonic) from the end-of-day recap,
+# reused by daily close when no stats were written in between
+EOD_SNAPSHOT_MAX_AGE_SEC = 3600
+_eod_snapshot = None
+
 
 def _today_brt():
     """Today's date in BRT for consistent daily_stats across server timezones."""
@@ -34,23 +63,42 @@ def init(db):
     global _scheduler, _db
     _db = db
 
-    _scheduler = BackgroundScheduler(timezone=BRT)
-
-    # Daily Opener: 08:00 BRT
-    _scheduler.add_job(
-        _job_daily_opener,
-        CronTrigger(hour=8, minute=0, timezone=BRT),
-        id="daily_opener",
-        name="Daily Opener (08:00 BRT)",
+    try:
+        db[config.SIGNALS_COLLECTION].create_index(SIGNALS_CREATED_STATUS_INDEX, background=True)
+    except Exception as e:
+        logger.warning(f"Could not create signals created_at/status index: {e}")
+
+    # Jobs block on Telegram HTTP calls; run them on a small worker pool so one slow send
+    # does not hold up the next tick of another job (sends are paced by the Telegram rate limiter anyway).
+    # The job set is fixed at startup, so a plain in-memory job store is all that is needed.
+    _scheduler = BackgroundScheduler(
+        timezone=BRT,
+        jobstores={"default": MemoryJobStore()},
+        executors={"default": ThreadPoolExecutor(max_workers=2)},
+        # Missed runs (process paused, long GC) fire once, never in parallel with themselves
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 120},
     )
 
-    # Mid-Day Recap: 14:00 BRT
-    _scheduler.add_job(
-        _job_midday_recap,
-        CronTrigger(hour=14, minute=0, timezone=BRT),
-        id="midday_recap",
-        name="Mid-Day Recap (14:00 BRT)",
+    # Template 2: Pattern Monitoring is pushed by signal_engine on new rounds (debounced to once per 12 min);
+    # its cron job below is only a safety net
+    signal_engine.register_pattern_eligible_callback(_on_pattern_eligible)
+
+    # Cron jobs: (function, CronTrigger fields, id, name, extra add_job kwargs)
+    cron_jobs = (
+        (_job_daily_opener, {"hour": 8, "minute": 0}, "daily_opener", "Daily Opener (08:00 BRT)", {}),
+        (_job_midday_recap, {"hour": 14, "minute": 0}, "midday_recap", "Mid-Day Recap (14:00 BRT)", {}),
+        (_job_end_of_day_recap, {"hour": 22, "minute": 30}, "end_of_day_recap", "End of Day Recap (22:30 BRT)", {}),
+        (_job_daily_close, {"hour": 23, "minute": 0}, "daily_close", "Daily Close (23:00 BRT)", {}),
+        (_job_weekly_recap, {"day_of_week": "sun", "hour": 21, "minute": 0}, "weekly_recap",
+         "Weekly Recap (Sunday 21:00 BRT)", {}),
+        (_job_pattern_monitoring, {"minute": "*/30"}, "pattern_monitoring",
+         "Pattern Monitoring safety net (every 30 min)", {}),
+        # Keep-Alive: top of every minute, post if channel silent 5+ min and not in cooldown.
+        # A late silence check is stale; skip it and wait for the next minute.
+        (_job_keep_alive, {"second": 0}, "keep_alive", "Keep-Alive check (every 1 min)", {"misfire_grace_time": 10}),
     )
+    for func, cron_fields, job_id, name, job_kwargs in cron_jobs:
+        _scheduler.add_job(func, CronTrigger(timezone=BRT, **cron_fields), id=job_id, name=name, **job_kwargs)
 
     # Session Summary: every 45-60 min (replaces Hourly Scoreboard)
     _session_summary_minutes = random.randint(45, 60)
@@ -61,46 +109,6 @@ def init(db):
         name=f"Session Summary (every {_session_summary_minutes} min)",
     )
 
-    # End of Day Recap: 22:30 BRT
-    _scheduler.add_job(
-        _job_end_of_day_recap,
-        CronTrigger(hour=22, minute=30, timezone=BRT),
-        id="end_of_day_recap",
-        name="End of Day Recap (22:30 BRT)",
-    )
-
-    # Daily Close: 23:00 BRT
-    _scheduler.add_job(
-        _job_daily_close,
-        CronTrigger(hour=23, minute=0, timezone=BRT),
-        id="daily_close",
-        name="Daily Close (23:00 BRT)",
-    )
-
-    # Weekly Recap: Sunday 21:00 BRT
-    _scheduler.add_job(
-        _job_weekly_recap,
-        CronTrigger(day_of_week="sun", hour=21, minute=0, timezone=BRT),
-        id="weekly_recap",
-        name="Weekly Recap (Sunday 21:00 BRT)",
-    )
-
-    # Template 2: Pattern Monitoring - every 12 min when 3+ rounds < 2x (no active signal)
-    _scheduler.add_job(
-        _job_pattern_monitoring,
-        CronTrigger(minute="*/12", timezone=BRT),
-        id="pattern_monitoring",
-        name="Pattern Monitoring (every 12 min)",
-    )
-
-    # Keep-Alive: check every 60s, post if channel silent 5+ min and not in cooldown
-    _scheduler.add_job(
-        _job_keep_alive,
-        IntervalTrigger(minutes=1, timezone=BRT),
-        id="keep_alive",
-        name="Keep-Alive check (every 1 min)",
-    )
-
     _scheduler.start()
     logger.info("Scheduler started with BRT timezone")
 
@@ -127,16 +135,67 @@ def shutdown():
 # ============================================================
 # Helper: Get daily_stats for a given date
 # ============================================================
-def _get_daily_stats(date_str):
-    """Get daily_stats doc for date (YYYY-MM-DD). Returns dict or None."""
+def _cached_daily_stats(date_str):
+    """Return (hit, doc) from the daily_stats cache."""
+    if date_str in _daily_stats_cache:
+        return True, _daily_stats_cache[date_str]
+    return False, None
+
+
+def _cache_daily_stats(date_str, doc, today_str):
+    if date_str < today_str:
+        _daily_stats_cache[date_str] = doc
+
+
+def _get_daily_stats(date_str, today_str=None):
+    """Get daily_stats doc for date (YYYY-MM-DD). Returns dict or None.
+    Pass today_str when the caller already has it to skip another clock/tz lookup."""
     if _db is None:
         return None
+    hit, doc = _cached_daily_stats(date_str)
+    if hit:
+        return doc
     try:
         coll = _db[config.DAILY_STATS_COLLECTION]
-        return coll.find_one({"_id": date_str})
+        doc = coll.find_one({"_id": date_str})
     except Exception as e:
         logger.debug(f"_get_daily_stats error: {e}")
         return None
+    _cache_daily_stats(date_str, doc, today_str or _today_brt().isoformat())
+    return doc
+
+
+def _get_week_stats(date_strs):
+    """
+    Wins/losses/signals_sent/rate for several dates in one aggregation (same rules as _get_today_wins_losses).
+    Returns {date_str: {"wins", "losses", "signals_sent", "rate"}}; dates without a doc are omitted.
+    """
+    if _db is None:
+        return {}
+    try:
+        coll = _db[config.DAILY_STATS_COLLECTION]
+        cursor = coll.aggregate([
+            {"$match": {"_id": {"$in": date_strs}}},
+            {"$project": {
+                "today_wins": 1,
+                "losses": {"$ifNull": ["$today_losses", {"$ifNull": ["$losses", 0]}]},
+                "signals_sent": {"$ifNull": ["$signals_sent", 0]},
+            }},
+            {"$addFields": {
+                "wins": {"$ifNull": ["$today_wins", {"$max": [0, {"$subtract": ["$signals_sent", "$losses"]}]}]},
+            }},
+            {"$addFields": {
+                "rate": {"$cond": [
+                    {"$gt": [{"$add": ["$wins", "$losses"]}, 0]},
+                    {"$multiply": [{"$divide": ["$wins", {"$add": ["$wins", "$losses"]}]}, 100]},
+                    0,
+                ]},
+            }},
+        ])
+        return {doc["_id"]: doc for doc in cursor}
+    except Exception as e:
+        logger.debug(f"_get_week_stats error: {e}")
+        return {}
 
 
 def _get_today_wins_losses(stats):
@@ -151,50 +210,95 @@ def _get_today_wins_losses(stats):
     return wins, losses
 
 
-def _get_signals_for_date(date_str):
-    """Get all resolved signals for a given date (YYYY-MM-DD). Returns list."""
+@lru_cache(maxsize=16)
+def _brt_day_bounds_utc(date_str):
+    """UTC [start, end) of the BRT calendar day date_str (YYYY-MM-DD)."""
+    start_local = datetime.fromisoformat(date_str).replace(tzinfo=BRT)
+    end_local = start_local + timedelta(days=1)
+    return start_local.astimezone(timezone.utc), end_local.astimezone(timezone.utc)
+
+
+def _get_day_results(date_str, stats):
+    """
+    (result_emojis, best_streak) for a BRT date. Uses the emoji_tape/best_streak kept on daily_stats
+    by the signal engine; falls back to scanning the day's signals for docs written before those fields.
+    """
+    if stats and "emoji_tape" in stats:
+        return "".join(stats["emoji_tape"]), stats.get("best_streak", 0)
+    result_emojis, _, _, best_streak = _summarize_signals(_iter_signals_for_date(date_str))
+    return result_emojis, best_streak
+
+
+def _iter_resolved_signals(start_utc, end_utc=None):
+    """
+    Stream resolved signals (status won/lost, only `status` projected) created in [start_utc, end_utc),
+    oldest first. Yields nothing on error.
+    """
     if _db is None:
-        return []
+        return
+    created_at = {"$gte": start_utc}
+    if end_utc is not None:
+        created_at["$lt"] = end_utc
     try:
         coll = _db[config.SIGNALS_COLLECTION]
-        # Resolved signals: status in (won, lost)
-        # Filter by created_at date (BRT)
-        start_dt = datetime.fromisoformat(date_str).replace(tzinfo=pytz.utc)
-        end_dt = start_dt + timedelta(days=1)
         cursor = coll.find(
             {
                 "status": {"$in": ["won", "lost"]},
-                "created_at": {"$gte": start_dt, "$lt": end_dt},
-            }
-        ).sort("created_at", 1)
-        return list(cursor)
+                "created_at": created_at,
+            },
+            {"status": 1, "_id": 0},
+        ).sort("created_at", 1).batch_size(500)
+        yield from cursor
     except Exception as e:
-        logger.debug(f"_get_signals_for_date error: {e}")
-        return []
+        logger.debug(f"_iter_resolved_signals error: {e}")
 
 
-def _build_result_emojis(signals):
-    """Build emoji string from list of signals: ✅ for won, 🛑 for lost."""
-    emojis = []
-    for sig in signals:
-        if sig.get("status") == "won":
-            emojis.append("✅")
-        elif sig.get("status") == "lost":
-            emojis.append("🛑")
-    return "".join(emojis)
+def _count_resolved_signals(start_utc):
+    """(wins, losses) for signals resolved won/lost created since start_utc, counted server-side in one aggregation."""
+    if _db is None:
+        return 0, 0
+    try:
+        coll = _db[config.SIGNALS_COLLECTION]
+        cursor = coll.aggregate(
+            [
+                {"$match": {"status": {"$in": ["won", "lost"]}, "created_at": {"$gte": start_utc}}},
+                {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+            ],
+        )
+        counts = {doc["_id"]: doc["n"] for doc in cursor}
+    except Exception as e:
+        logger.debug(f"_count_resolved_signals error: {e}")
+        return 0, 0
+    return counts.get("won", 0), counts.get("lost", 0)
+
 
+def _iter_signals_for_date(date_str):
+    """Stream resolved signals for a given BRT date (YYYY-MM-DD)."""
+    return _iter_resolved_signals(*_brt_day_bounds_utc(date_str))
 
-def _calculate_best_streak(signals):
-    """Calculate the longest consecutive win streak from a list of signals."""
-    best = 0
-    current = 0
+
+def _summarize_signals(signals):
+    """
+    Single pass over resolved signals (oldest first).
+    Returns (result_emojis, wins, losses, best_streak): ✅ for won, 🛑 for lost; best_streak is the longest run of wins.
+    """
+    emojis = []
+    wins = losses = best = current = 0
     for sig in signals:
-        if sig.get("status") == "won":
+        status = sig.get("status")
+        emoji = RESULT_EMOJIS.get(status)
+        if emoji is not None:
+            emojis.append(emoji)
+        if status == "won":
+            wins += 1
             current += 1
-            best = max(best, current)
+            if current > best:
+                best = current
         else:
+            if status == "lost":
+                losses += 1
             current = 0
-    return best
+    return "".join(emojis), wins, losses, best
 
 
 # ============================================================
@@ -203,8 +307,9 @@ def _calculate_best_streak(signals):
 def _job_daily_opener():
     """Send daily opener with yesterday's stats. Clears any session_closed flag."""
     signal_engine.clear_session_closed()
-    yesterday = (_today_brt() - timedelta(days=1)).isoformat()
-    stats = _get_daily_stats(yesterday)
+    today = _today_brt()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    stats = _get_daily_stats(yesterday, today.isoformat())
     wins, losses = _get_today_wins_losses(stats)
     telegram_service.send_daily_opener(wins, losses)
 
@@ -212,12 +317,23 @@ def _job_daily_opener():
 # ============================================================
 # Job: Template 2 - Pattern Monitoring (every 12 min)
 # ============================================================
+def _on_pattern_eligible(count, remaining):
+    """Send pattern monitoring at most once per PATTERN_MONITORING_MIN_INTERVAL_SEC."""
+    global _last_pattern_monitoring_at
+    with _pattern_monitoring_lock:
+        now = time.monotonic()
+        if _last_pattern_monitoring_at is not None and now - _last_pattern_monitoring_at < PATTERN_MONITORING_MIN_INTERVAL_SEC:
+            return
+        _last_pattern_monitoring_at = now
+    telegram_service.send_pattern_monitoring(count, remaining)
+
+
 def _job_pattern_monitoring():
-    """Send pattern monitoring when 3+ rounds < 2x, no active signal, not in cooldown."""
+    """Safety net: send pattern monitoring when 3+ rounds < 2x, no active signal, not in cooldown."""
     data = signal_engine.get_pattern_monitoring_data()
     if data:
         count, remaining = data
-        telegram_service.send_pattern_monitoring(count, remaining)
+        _on_pattern_eligible(count, remaining)
 
 
 # ============================================================
@@ -234,12 +350,10 @@ def _job_keep_alive():
 def _job_midday_recap():
     """Send mid-day recap with today's stats so far."""
     today_str = _today_brt().isoformat()
-    stats = _get_daily_stats(today_str)
+    stats = _get_daily_stats(today_str, today_str)
     wins, losses = _get_today_wins_losses(stats)
 
-    signals = _get_signals_for_date(today_str)
-    result_emojis = _build_result_emojis(signals)
-    best_streak = _calculate_best_streak(signals)
+    result_emojis, best_streak = _get_day_results(today_str, stats)
 
     telegram_service.send_midday_recap(result_emojis, wins, losses, best_streak)
 
@@ -259,36 +373,24 @@ def _job_session_summary():
         logger.debug(f"_job_session_summary state error: {e}")
         state = {}
     last_at = state.get("last_session_summary_at")
-    today_8am = BRT.localize(datetime(_today_brt().year, _today_brt().month, _today_brt().day, 8, 0))
+    today = now.date()
+    today_8am = datetime(today.year, today.month, today.day, 8, 0, tzinfo=BRT)
     if last_at is None:
         if now < today_8am:
             return  # Before 08:00, skip
         session_start = today_8am
     else:
         if hasattr(last_at, "tzinfo") and last_at.tzinfo is None:
-            last_at = last_at.replace(tzinfo=pytz.utc)
+            last_at = last_at.replace(tzinfo=timezone.utc)
         last_brt = last_at.astimezone(BRT)
         # New day: use 08:00 BRT today as session start
-        if last_brt.date() < _today_brt():
+        if last_brt.date() < today:
             session_start = today_8am
         else:
             session_start = last_brt
-    session_start_utc = session_start.astimezone(pytz.utc)
-    try:
-        coll = _db[config.SIGNALS_COLLECTION]
-        cursor = coll.find(
-            {
-                "status": {"$in": ["won", "lost"]},
-                "created_at": {"$gte": session_start_utc},
-            }
-        ).sort("created_at", 1)
-        signals = list(cursor)
-    except Exception as e:
-        logger.debug(f"_job_session_summary signals error: {e}")
-        signals = []
-    period_wins = sum(1 for s in signals if s.get("status") == "won")
-    period_losses = sum(1 for s in signals if s.get("status") == "lost")
-    total_signals = len(signals)
+    session_start_utc = session_start.astimezone(timezone.utc)
+    period_wins, period_losses = _count_resolved_signals(session_start_utc)
+    total_signals = period_wins + period_losses
     if total_signals == 0:
         logger.info("No signals in session period, skipping session summary")
         return
@@ -304,7 +406,7 @@ def _job_session_summary():
     try:
         engine_coll.update_one(
             {"_id": "state"},
-            {"$set": {"last_session_summary_at": datetime.now(pytz.utc)}},
+            {"$set": {"last_session_summary_at": datetime.now(timezone.utc)}},
             upsert=True,
         )
     except Exception as e:
@@ -317,13 +419,15 @@ def _job_session_summary():
 def _job_end_of_day_recap():
     """Send end of day recap with full day stats."""
     today_str = _today_brt().isoformat()
-    stats = _get_daily_stats(today_str)
+    # Take the revision before the (uncached) read: a write landing after it bumps the revision and voids the snapshot
+    revision = signal_engine.daily_stats_revision()
+    stats = _get_daily_stats(today_str, today_str)
     wins, losses = _get_today_wins_losses(stats)
     total_signals = stats.get("signals_sent", 0) if stats else 0
+    global _eod_snapshot
+    _eod_snapshot = (today_str, wins, losses, revision, time.monotonic())
 
-    signals = _get_signals_for_date(today_str)
-    result_emojis = _build_result_emojis(signals)
-    best_streak = _calculate_best_streak(signals)
+    result_emojis, best_streak = _get_day_results(today_str, stats)
 
     telegram_service.send_end_of_day_recap(result_emojis, wins, losses, best_streak, total_signals)
 
@@ -332,10 +436,19 @@ def _job_end_of_day_recap():
 # Job: Daily Close (23:00 BRT)
 # ============================================================
 def _job_daily_close():
-    """Send daily close message with today's stats."""
+    """Send daily close message with today's stats (reuses the end-of-day recap's numbers when still current)."""
     today_str = _today_brt().isoformat()
-    stats = _get_daily_stats(today_str)
-    wins, losses = _get_today_wins_losses(stats)
+    snapshot = _eod_snapshot
+    if (
+        snapshot is not None
+        and snapshot[0] == today_str
+        and snapshot[3] == signal_engine.daily_stats_revision()
+        and time.monotonic() - snapshot[4] < EOD_SNAPSHOT_MAX_AGE_SEC
+    ):
+        wins, losses = snapshot[1], snapshot[2]
+    else:
+        stats = _get_daily_stats(today_str, today_str)
+        wins, losses = _get_today_wins_losses(stats)
     telegram_service.send_daily_close(wins, losses)
 
 
@@ -351,7 +464,6 @@ def _job_weekly_recap():
     # Week is Mon-Sun, so start is last_sunday - 6 days
     week_start = last_sunday - timedelta(days=6)
 
-    day_names = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
     daily_data = []
     week_wins = 0
     week_losses = 0
@@ -359,22 +471,23 @@ def _job_weekly_recap():
     best_day_name = ""
     best_day_rate = 0
 
-    for i in range(7):
-        current_date = week_start + timedelta(days=i)
-        date_str = current_date.isoformat()
-        stats = _get_daily_stats(date_str)
-        wins, losses = _get_today_wins_losses(stats)
-        total = wins + losses
-        rate = (wins / total * 100) if total > 0 else 0
+    week_date_strs = [(week_start + timedelta(days=i)).isoformat() for i in range(7)]
+    week_stats = _get_week_stats(week_date_strs)
 
-        daily_data.append({"day": day_names[i], "wins": wins, "losses": losses, "rate": rate})
+    for day_name, date_str in zip(WEEKDAY_NAMES, week_date_strs):
+        stats = week_stats.get(date_str)
+        if stats:
+            wins, losses, rate = stats["wins"], stats["losses"], stats["rate"]
+            week_total_signals += stats["signals_sent"]
+        else:
+            wins, losses, rate = 0, 0, 0
+
+        daily_data.append({"day": day_name, "wins": wins, "losses": losses, "rate": rate})
         week_wins += wins
         week_losses += losses
-        if stats:
-            week_total_signals += stats.get("signals_sent", 0)
 
         if rate > best_day_rate:
             best_day_rate = rate
-            best_day_name = day_names[i]
+            best_day_name = day_name
 
     telegram_service.send_weekly_recap(daily_data, week_wins, week_losses, week_total_signals, best_day_name, best_day_rate)
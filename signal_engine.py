@@ -3,16 +3,26 @@ Signal Engine: trigger logic, resolution (gale), state machine, and persistence.
 Uses MongoDB collections: rounds (read), signals, daily_stats, engine_state (cooldown).
 """
 import logging
+import queue
 import random
+import threading
+from concurrent.futures import Future
 from datetime import datetime, timezone, time, timedelta
-import pytz
+from time import monotonic
+from zoneinfo import ZoneInfo
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.write_concern import WriteConcern
 
 import config
 import telegram_service
 
 logger = logging.getLogger(__name__)
 
-BRT = pytz.timezone("America/Sao_Paulo")
+BRT = ZoneInfo("America/Sao_Paulo")
+
+# Called with (count, remaining) when a round leaves a 3+ under-threshold run with no signal (set by scheduler)
+_pattern_eligible_callback = None
 
 # Database and collections (set by init)
 _db = None
@@ -20,6 +30,10 @@ _rounds_coll = None
 _signals_coll = None
 _daily_stats_coll = None
 _engine_state_coll = None
+_counters_coll = None
+
+# Counter doc in the counters collection holding the last signal _id
+SIGNALS_COUNTER_ID = "signals"
 
 # Signal status values (matches schema: active, won, gale1, gale2, lost)
 STATUS_ACTIVE = "active"
@@ -27,37 +41,173 @@ STATUS_WON = "won"
 STATUS_GALE1 = "gale1"
 STATUS_GALE2 = "gale2"
 STATUS_LOST = "lost"
+ACTIVE_STATUSES = [STATUS_ACTIVE, STATUS_GALE1, STATUS_GALE2]
+
+# Tuning values read from config, bound to module globals by refresh_config() so hot paths skip attribute lookups
+_THRESHOLD = None
+_SEQUENCE_LENGTH = None
+_MAX_GALE = None
+_COOLDOWN_ROUNDS = None
+_TARGET_CASHOUT = None
+_OPERATING_HOURS_ONLY = False
+_KEEP_ALIVE_SILENCE_MINUTES = 5
+_VOLATILITY_THRESHOLD = 1.20
+_INTERRUPTED_COOLDOWN_MINUTES = 2
+_PRE_SIGNAL_MIN_INTERVAL_SEC = 90
+_MAX_INTERRUPTS_PER_HOUR = 5
+_MAX_INTERRUPT_RATE = 0.30
+_VOLATILITY_COOLDOWN_MIN_MIN = 5
+_VOLATILITY_COOLDOWN_MAX_MIN = 8
+
+
+def refresh_config():
+    """(Re)bind tuning values from config. Runs at import and in init(); call again if config changes at runtime."""
+    global _THRESHOLD, _SEQUENCE_LENGTH, _MAX_GALE, _COOLDOWN_ROUNDS, _TARGET_CASHOUT, _OPERATING_HOURS_ONLY
+    global _KEEP_ALIVE_SILENCE_MINUTES, _VOLATILITY_THRESHOLD, _INTERRUPTED_COOLDOWN_MINUTES
+    global _PRE_SIGNAL_MIN_INTERVAL_SEC, _MAX_INTERRUPTS_PER_HOUR, _MAX_INTERRUPT_RATE, _round_window_loaded
+    global _VOLATILITY_COOLDOWN_MIN_MIN, _VOLATILITY_COOLDOWN_MAX_MIN
+    _THRESHOLD = config.THRESHOLD
+    _SEQUENCE_LENGTH = config.SEQUENCE_LENGTH
+    _MAX_GALE = config.MAX_GALE
+    _COOLDOWN_ROUNDS = config.COOLDOWN_ROUNDS
+    _TARGET_CASHOUT = config.TARGET_CASHOUT
+    _OPERATING_HOURS_ONLY = getattr(config, "OPERATING_HOURS_ONLY", False)
+    _KEEP_ALIVE_SILENCE_MINUTES = getattr(config, "KEEP_ALIVE_SILENCE_MINUTES", 5)
+    _VOLATILITY_THRESHOLD = getattr(config, "VOLATILITY_THRESHOLD", 1.20)
+    _INTERRUPTED_COOLDOWN_MINUTES = getattr(config, "INTERRUPTED_COOLDOWN_MINUTES", 2)
+    _PRE_SIGNAL_MIN_INTERVAL_SEC = getattr(config, "PRE_SIGNAL_MIN_INTERVAL_SEC", 90)
+    _MAX_INTERRUPTS_PER_HOUR = getattr(config, "MAX_INTERRUPTS_PER_HOUR", 5)
+    _MAX_INTERRUPT_RATE = getattr(config, "MAX_INTERRUPT_RATE", 0.30)
+    _VOLATILITY_COOLDOWN_MIN_MIN = getattr(config, "VOLATILITY_COOLDOWN_MIN_MIN", 5)
+    _VOLATILITY_COOLDOWN_MAX_MIN = getattr(config, "VOLATILITY_COOLDOWN_MAX_MIN", 8)
+    # Round-window bitmasks depend on the thresholds: rebuild them on next use
+    _round_window_loaded = False
+
+
+refresh_config()
+
+# Engine-local RNG (cooldown durations, keep-alive variants), independent of the shared module-level one
+_rng = random.Random()
+
+# Telegram sends run on one background worker in submission order, so round handling never waits on HTTP
+_tg_queue = queue.Queue()
+_tg_worker = None
+
+# Per-result emoji appended to daily_stats.emoji_tape (✅ won, 🛑 lost)
+RESULT_EMOJI_WON = "✅"
+RESULT_EMOJI_LOST = "🛑"
 
 
 def init(db):
     """Initialize signal engine with MongoDB database. Uses same DB as rounds."""
-    global _db, _rounds_coll, _signals_coll, _daily_stats_coll, _engine_state_coll
+    global _db, _rounds_coll, _signals_coll, _daily_stats_coll, _engine_state_coll, _counters_coll
     _db = db
     _rounds_coll = db[config.MONGODB_COLLECTION]
     _signals_coll = db[config.SIGNALS_COLLECTION]
     _daily_stats_coll = db[config.DAILY_STATS_COLLECTION]
-    _engine_state_coll = db[config.ENGINE_STATE_COLLECTION]
+    # engine_state holds best-effort flags and timestamps: primary ack is enough, no journal/majority wait.
+    # signals and daily_stats keep the client's default write concern.
+    _engine_state_coll = db.get_collection(
+        config.ENGINE_STATE_COLLECTION, write_concern=WriteConcern(w=1, j=False)
+    )
+    _counters_coll = db[config.COUNTERS_COLLECTION]
+    refresh_config()
+    _seed_signal_counter()
+    try:
+        # Partial index: only in-progress signals (at most one) are indexed, so get_active_signal never scans
+        _signals_coll.create_index(
+            [("status", 1)],
+            name="active_status",
+            partialFilterExpression={"status": {"$in": ACTIVE_STATUSES}},
+            background=True,
+        )
+    except Exception as e:
+        logger.warning(f"Could not create signals active status index: {e}")
     telegram_service.register_message_sent_callback(record_message_sent)
+    _start_telegram_worker()
     logger.info("Signal engine initialized (signals, daily_stats, engine_state)")
 
 
+# Upper bound a round handler waits for a queued send whose message ids it needs (queue backlog + jitter + HTTP)
+TELEGRAM_RESULT_TIMEOUT_SEC = 15
+
+
+def _telegram_worker_loop():
+    while True:
+        fn, args, kwargs, future = _tg_queue.get()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            logger.debug(f"Queued Telegram send {getattr(fn, '__name__', fn)} error: {e}")
+            future.set_exception(e)
+
+
+def _start_telegram_worker():
+    global _tg_worker
+    if _tg_worker is not None:
+        return
+    _tg_worker = threading.Thread(target=_telegram_worker_loop, name="telegram-sender", daemon=True)
+    _tg_worker.start()
+
+
+def _enqueue(fn, *args, **kwargs):
+    """
+    Queue a Telegram send and return a Future for its result.
+    Callers that need the message ids call .result(); the queue keeps every send in order either way.
+    """
+    future = Future()
+    if _tg_worker is None:
+        # Not initialized (no worker yet): send inline
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    _tg_queue.put((fn, args, kwargs, future))
+    return future
+
+
+def flush_telegram_queue(timeout=30):
+    """Block until every Telegram send queued so far has been attempted (used at shutdown)."""
+    try:
+        _enqueue(lambda: None).result(timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Telegram queue not drained: {e}")
+
+
+def register_pattern_eligible_callback(callback):
+    """Register callback(count, remaining) invoked when pattern monitoring becomes eligible on a new round."""
+    global _pattern_eligible_callback
+    _pattern_eligible_callback = callback
+
+
+def _notify_pattern_eligible(count):
+    """Run the pattern-eligible callback on the Telegram worker so its send stays ordered with the rest."""
+    if _pattern_eligible_callback is None:
+        return
+    _enqueue(_pattern_eligible_callback, count, max(0, _SEQUENCE_LENGTH - count))
+
+
 def _get_rounds_collection():
     if _rounds_coll is None:
         return None
     return _rounds_coll
 
 
-def get_recent_rounds(n):
+def get_recent_rounds(n, max_id=None):
     """
     Get the last n rounds (newest first). Each item: { _id, multiplier }.
-    Only considers rounds with integer _id.
+    Only considers rounds with integer _id, and only up to max_id if given.
     """
     coll = _get_rounds_collection()
     if coll is None:
         return []
+    id_filter = {"$type": "int"}
+    if max_id is not None:
+        id_filter["$lte"] = max_id
     try:
         cursor = coll.find(
-            {"_id": {"$type": "int"}},
+            {"_id": id_filter},
             {"_id": 1, "multiplier": 1}
         ).sort("_id", -1).limit(n)
         return list(cursor)
@@ -66,45 +216,177 @@ def get_recent_rounds(n):
         return []
 
 
+# Rolling window of the newest rounds as bitmasks (bit 0 = newest round):
+# bit i of _under_threshold_mask is set iff round i was < THRESHOLD, likewise for VOLATILITY_THRESHOLD.
+# Updated in on_new_round, hydrated from the rounds collection once.
+ROUND_WINDOW = 16
+_ROUND_WINDOW_MASK = (1 << ROUND_WINDOW) - 1
+_VOLATILITY_RUN_MASK = 0b111  # 3 newest rounds
+_under_threshold_mask = 0
+_volatility_mask = 0
+_latest_round_id = None
+_latest_multiplier = None
+_round_window_loaded = False
+
+
+def _push_round(round_id, multiplier):
+    """Shift one round into the rolling window."""
+    global _under_threshold_mask, _volatility_mask, _latest_round_id, _latest_multiplier
+    if multiplier is None:
+        multiplier = 0
+    _under_threshold_mask = ((_under_threshold_mask << 1) | (multiplier < _THRESHOLD)) & _ROUND_WINDOW_MASK
+    _volatility_mask = ((_volatility_mask << 1) | (multiplier < _VOLATILITY_THRESHOLD)) & _ROUND_WINDOW_MASK
+    _latest_round_id = round_id
+    _latest_multiplier = multiplier
+
+
+def _load_round_window(max_id=None):
+    """
+    Hydrate the rolling window from the newest rounds in DB (once per process).
+    max_id stops at the round being handled, so later rounds of a saved burst are still pushed one by one.
+    """
+    global _under_threshold_mask, _volatility_mask, _round_window_loaded
+    if _round_window_loaded or _rounds_coll is None:
+        return
+    recent = get_recent_rounds(ROUND_WINDOW, max_id)
+    _under_threshold_mask = 0
+    _volatility_mask = 0
+    for r in reversed(recent):
+        _push_round(r.get("_id"), r.get("multiplier"))
+    _round_window_loaded = True
+
+
+def _newest_multiplier():
+    """Multiplier of the newest round: from the round window, or one projected query before it is loaded."""
+    if _round_window_loaded:
+        return _latest_multiplier
+    coll = _get_rounds_collection()
+    if coll is None:
+        return 0
+    try:
+        doc = coll.find_one({"_id": {"$type": "int"}}, {"_id": 0, "multiplier": 1}, sort=[("_id", -1)])
+        return doc.get("multiplier", 0) if doc else 0
+    except Exception as e:
+        logger.debug(f"_newest_multiplier error: {e}")
+        return 0
+
+
+def _trailing_ones(mask):
+    """Number of consecutive set bits from bit 0."""
+    return (~mask & (mask + 1)).bit_length() - 1
+
+
+# Active signal cache: loaded from DB once, then kept current by create_signal / update_signal_gale / mark_won / mark_lost
+_active_signal_cache = None
+_active_loaded = False
+
+
 def get_active_signal():
     """Return the single active signal document, or None.
     Active = status in (active, gale1, gale2) - signal is still in progress awaiting result.
     """
+    global _active_signal_cache, _active_loaded
+    if _active_loaded:
+        return _active_signal_cache
     if _signals_coll is None:
         return None
     try:
-        return _signals_coll.find_one(
-            {"status": {"$in": [STATUS_ACTIVE, STATUS_GALE1, STATUS_GALE2]}}
-        )
+        _active_signal_cache = _signals_coll.find_one({"status": {"$in": ACTIVE_STATUSES}})
+        _active_loaded = True
+        return _active_signal_cache
     except Exception as e:
         logger.debug(f"get_active_signal error: {e}")
         return None
 
 
+def _set_active_signal(signal):
+    global _active_signal_cache, _active_loaded
+    _active_signal_cache = signal
+    _active_loaded = True
+
+
+def invalidate_active_signal():
+    """Drop the cached active signal so the next get_active_signal re-reads it from DB."""
+    global _active_signal_cache, _active_loaded
+    _active_signal_cache = None
+    _active_loaded = False
+
+
 def active_signal_exists():
     return get_active_signal() is not None
 
 
-def _get_engine_state():
+# engine_state snapshot shared by reads within a short window; every write through this module drops it
+ENGINE_STATE_CACHE_TTL_SEC = 0.5
+_engine_state_cache = None
+_engine_state_cached_at = 0.0
+
+
+def _get_engine_state(force=False):
+    """engine_state doc (empty dict if missing). Served from the snapshot cache unless stale or force=True."""
+    global _engine_state_cache, _engine_state_cached_at
     if _engine_state_coll is None:
         return {}
+    cached = _engine_state_cache
+    if not force and cached is not None and monotonic() - _engine_state_cached_at < ENGINE_STATE_CACHE_TTL_SEC:
+        return cached
     try:
-        doc = _engine_state_coll.find_one({"_id": "state"})
-        return doc or {}
+        doc = _engine_state_coll.find_one({"_id": "state"}) or {}
+        _engine_state_cache = doc
+        _engine_state_cached_at = monotonic()
+        return doc
     except Exception as e:
         logger.debug(f"_get_engine_state error: {e}")
         return {}
 
 
-def is_session_closed():
-    """True if we're between 23:00 and 08:00 BRT and OPERATING_HOURS_ONLY is enabled."""
-    if not getattr(config, "OPERATING_HOURS_ONLY", False):
+def _invalidate_engine_state():
+    global _engine_state_cache
+    _engine_state_cache = None
+
+
+def _update_engine_state(update, upsert=True):
+    """update_one on the engine_state doc; drops the cached snapshot so the next read sees the write."""
+    try:
+        _engine_state_coll.update_one({"_id": "state"}, update, upsert=upsert)
+    finally:
+        _invalidate_engine_state()
+
+
+# Operating hours in BRT: signals only between 08:00 and 23:00 when OPERATING_HOURS_ONLY is enabled
+SESSION_OPEN_TIME = time(8, 0)
+SESSION_CLOSE_TIME = time(23, 0)
+
+# UTC bounds of the current day's operating window, recomputed only once now leaves it
+_open_window_utc = (None, None)
+
+
+def _in_operating_hours(now_utc):
+    """True if now_utc falls inside today's 08:00-23:00 BRT window."""
+    global _open_window_utc
+    start, end = _open_window_utc
+    if start is not None and start <= now_utc < end:
+        return True
+    day = now_utc.astimezone(BRT).date()
+    start = datetime.combine(day, SESSION_OPEN_TIME, tzinfo=BRT).astimezone(timezone.utc)
+    end = datetime.combine(day, SESSION_CLOSE_TIME, tzinfo=BRT).astimezone(timezone.utc)
+    _open_window_utc = (start, end)
+    return start <= now_utc < end
+
+
+def is_session_closed(state=None):
+    """True if we're between 23:00 and 08:00 BRT and OPERATING_HOURS_ONLY is enabled.
+    state: engine_state doc already fetched by the caller (read from DB if None).
+    """
+    if not _OPERATING_HOURS_ONLY:
         return False
-    state = _get_engine_state()
-    if state.get("session_closed") is False:
-        return False  # Explicitly opened by daily_opener
-    now = datetime.now(BRT).time()
-    return now >= time(23, 0) or now < time(8, 0)
+    # Inside operating hours the session_closed override cannot close it, so skip engine_state entirely
+    if _in_operating_hours(datetime.now(timezone.utc)):
+        return False
+    if state is None:
+        state = _get_engine_state()
+    # Explicitly opened by daily_opener
+    return state.get("session_closed") is not False
 
 
 def clear_session_closed():
@@ -112,30 +394,54 @@ def clear_session_closed():
     if _engine_state_coll is None:
         return
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"session_closed": False}},
-            upsert=True,
-        )
+        _update_engine_state({"$set": {"session_closed": False}})
         logger.info("Session opened (daily_opener)")
     except Exception as e:
         logger.debug(f"clear_session_closed error: {e}")
 
 
+# last_message_at is tracked in memory and written back to engine_state at most once per interval;
+# the keep-alive job and shutdown write back whatever a burst left unflushed (flush_last_message_at)
+LAST_MESSAGE_FLUSH_INTERVAL_SEC = 10
+_last_message_at = None
+_last_message_flushed_at = None
+
+
 def record_message_sent():
     """Update last_message_at for keep-alive tracking. Called via callback when any message is sent."""
+    global _last_message_at, _last_message_flushed_at
+    now = datetime.now(timezone.utc)
+    _last_message_at = now
     if _engine_state_coll is None:
         return
+    if _last_message_flushed_at is not None and (now - _last_message_flushed_at).total_seconds() < LAST_MESSAGE_FLUSH_INTERVAL_SEC:
+        return
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"last_message_at": datetime.now(timezone.utc)}},
-            upsert=True,
-        )
+        _update_engine_state({"$set": {"last_message_at": now}})
+        _last_message_flushed_at = now
     except Exception as e:
         logger.debug(f"record_message_sent error: {e}")
 
 
+def _mark_last_message_flushed(at):
+    """Record that last_message_at = at is now in engine_state."""
+    global _last_message_at, _last_message_flushed_at
+    _last_message_at = at
+    _last_message_flushed_at = at
+
+
+def flush_last_message_at():
+    """Write the in-memory last_message_at to engine_state if a throttled update is still pending."""
+    at = _last_message_at
+    if _engine_state_coll is None or at is None or at == _last_message_flushed_at:
+        return
+    try:
+        _update_engine_state({"$set": {"last_message_at": at}})
+        _mark_last_message_flushed(at)
+    except Exception as e:
+        logger.debug(f"flush_last_message_at error: {e}")
+
+
 def check_and_send_keep_alive():
     """
     If channel silent for KEEP_ALIVE_SILENCE_MINUTES and NOT in cooldown, post keep-alive.
@@ -144,19 +450,22 @@ def check_and_send_keep_alive():
     """
     if _engine_state_coll is None:
         return
+    flush_last_message_at()
+    # One engine_state read shared by every check below
+    state = _get_engine_state()
     # Volatility cooldown midpoint: post one keep-alive midway through
-    check_volatility_cooldown_midpoint()
-    if is_in_volatility_cooldown():
+    check_volatility_cooldown_midpoint(state)
+    if is_in_volatility_cooldown(state):
         return  # Skip normal keep-alive during volatility cooldown (we have midpoint)
-    if in_cooldown():
+    if in_cooldown(state):
         return
-    if _is_in_interrupted_cooldown():
+    if _is_in_interrupted_cooldown(state):
         return
     if active_signal_exists():
         return  # Don't keep-alive while signal is active
-    silence_min = getattr(config, "KEEP_ALIVE_SILENCE_MINUTES", 5)
-    state = _get_engine_state()
-    last_at = state.get("last_message_at")
+    silence_min = _KEEP_ALIVE_SILENCE_MINUTES
+    # In-memory value is the freshest; the DB copy covers the first check after a restart
+    last_at = _last_message_at or state.get("last_message_at")
     if last_at is None:
         return  # No message sent yet, skip
     if isinstance(last_at, datetime) and last_at.tzinfo is None:
@@ -167,20 +476,19 @@ def check_and_send_keep_alive():
     # Rotate: pick next variant (0,1,2) never same twice
     next_variant = (last_variant + 1) % 3
     try:
-        telegram_service.send_keep_alive_message(next_variant)
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"last_message_at": datetime.now(timezone.utc), "last_keep_alive_variant": next_variant}},
-            upsert=True,
-        )
+        _enqueue(telegram_service.send_keep_alive_message, next_variant)
+        now = datetime.now(timezone.utc)
+        _update_engine_state({"$set": {"last_message_at": now, "last_keep_alive_variant": next_variant}})
+        _mark_last_message_flushed(now)
         logger.info(f"Keep-alive sent (variant {next_variant})")
     except Exception as e:
         logger.debug(f"check_and_send_keep_alive error: {e}")
 
 
-def is_in_volatility_cooldown():
+def is_in_volatility_cooldown(state=None):
     """True if in volatility cooldown (3 consecutive rounds < 1.20x)."""
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     until = state.get("volatility_cooldown_until")
     if until is None:
         return False
@@ -192,46 +500,39 @@ def is_in_volatility_cooldown():
         return False
 
 
-def _check_volatility_trigger(recent_rounds):
+def _check_volatility_trigger():
     """True if last 3 rounds all have multiplier < VOLATILITY_THRESHOLD (1.20x)."""
-    threshold = getattr(config, "VOLATILITY_THRESHOLD", 1.20)
-    if len(recent_rounds) < 3:
-        return False
-    last_3 = recent_rounds[:3]
-    return all(r.get("multiplier", 999) < threshold for r in last_3)
+    return _volatility_mask & _VOLATILITY_RUN_MASK == _VOLATILITY_RUN_MASK
 
 
 def _enter_volatility_cooldown():
     """Enter volatility cooldown: 5-8 min pause, post message, schedule midpoint keep-alive."""
     if _engine_state_coll is None:
         return
-    min_min = getattr(config, "VOLATILITY_COOLDOWN_MIN_MIN", 5)
-    max_min = getattr(config, "VOLATILITY_COOLDOWN_MAX_MIN", 8)
-    duration_min = random.randint(min_min, max_min)
+    duration_min = _rng.randrange(_VOLATILITY_COOLDOWN_MIN_MIN, _VOLATILITY_COOLDOWN_MAX_MIN + 1)
     now = datetime.now(timezone.utc)
     until = now + timedelta(minutes=duration_min)
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
+        _update_engine_state(
             {"$set": {
                 "volatility_cooldown_until": until,
                 "volatility_cooldown_started_at": now,
                 "volatility_cooldown_duration_min": duration_min,
                 "volatility_cooldown_midpoint_sent": False,
             }},
-            upsert=True,
         )
-        telegram_service.send_cooldown_mode_message()
+        _enqueue(telegram_service.send_cooldown_mode_message)
         logger.info(f"Volatility cooldown entered for {duration_min} minutes")
     except Exception as e:
         logger.debug(f"_enter_volatility_cooldown error: {e}")
 
 
-def check_volatility_cooldown_midpoint():
+def check_volatility_cooldown_midpoint(state=None):
     """If in volatility cooldown and past midpoint, post one keep-alive and mark sent."""
     if _engine_state_coll is None:
         return
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     until = state.get("volatility_cooldown_until")
     started = state.get("volatility_cooldown_started_at")
     midpoint_sent = state.get("volatility_cooldown_midpoint_sent", False)
@@ -249,46 +550,41 @@ def check_volatility_cooldown_midpoint():
     now = datetime.now(timezone.utc)
     if now >= midpoint:
         # Pick a random keep-alive variant for midpoint
-        variant = random.randint(0, 2)
-        telegram_service.send_keep_alive_message(variant)
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"volatility_cooldown_midpoint_sent": True}},
-        )
+        variant = _rng.randrange(3)
+        _enqueue(telegram_service.send_keep_alive_message, variant)
+        _update_engine_state({"$set": {"volatility_cooldown_midpoint_sent": True}}, upsert=False)
         logger.info("Volatility cooldown midpoint keep-alive sent")
 
 
-def _consecutive_under_threshold(recent_rounds):
+def _consecutive_under_threshold():
     """Count consecutive rounds from newest that are all < THRESHOLD. Returns 0, 1, 2, 3, ..."""
-    if not recent_rounds:
-        return 0
-    count = 0
-    for r in recent_rounds:
-        if r.get("multiplier", 999) < config.THRESHOLD:
-            count += 1
-        else:
-            break
-    return count
+    return _trailing_ones(_under_threshold_mask)
 
 
-def _pre_signal_sent_for_run():
+def _pre_signal_sent_for_run(state=None):
     """True if we already sent Template 2 for this run (so we don't send again until trigger or reset)."""
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     return state.get("pre_signal_sent", False) is True
 
 
-def _set_pre_signal_sent(value):
-    """Set/clear pre_signal_sent flag in engine state."""
-    if _engine_state_coll is None:
-        return
+# monotonic() of the last Template 2 this process sent; until then the persisted last_pre_signal_at is used
+_last_pre_signal_mono = None
+
+
+def _pre_signal_throttled(state):
+    """True if Template 2 went out less than PRE_SIGNAL_MIN_INTERVAL_SEC ago."""
+    if _last_pre_signal_mono is not None:
+        return monotonic() - _last_pre_signal_mono < _PRE_SIGNAL_MIN_INTERVAL_SEC
+    last_pre = state.get("last_pre_signal_at")
+    if last_pre is None:
+        return False
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"pre_signal_sent": value}},
-            upsert=True,
-        )
-    except Exception as e:
-        logger.debug(f"_set_pre_signal_sent error: {e}")
+        if isinstance(last_pre, datetime) and last_pre.tzinfo is None:
+            last_pre = last_pre.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - last_pre).total_seconds() < _PRE_SIGNAL_MIN_INTERVAL_SEC
+    except Exception:
+        return False
 
 
 def _clear_pre_signal_state():
@@ -296,21 +592,20 @@ def _clear_pre_signal_state():
     if _engine_state_coll is None:
         return
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
+        _update_engine_state(
             {
                 "$set": {"pre_signal_sent": False},
                 "$unset": {"last_pre_signal_message_id": "", "last_pre_signal_message_id_2": ""}
             },
-            upsert=True,
         )
     except Exception as e:
         logger.debug(f"_clear_pre_signal_state error: {e}")
 
 
-def _get_interrupt_stats():
+def _get_interrupt_stats(state=None):
     """Hourly stats for interrupt governance. Reset when hour (BRT) changes."""
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     hour_key = datetime.now(BRT).strftime("%Y-%m-%d-%H")
     stats = state.get("interrupt_stats") or {}
     if stats.get("hour_key") != hour_key:
@@ -318,13 +613,13 @@ def _get_interrupt_stats():
     return stats, hour_key
 
 
-def _should_post_interrupted_signal():
+def _should_post_interrupted_signal(state=None):
     """True if we may post 'Sinal cancelado' (under hourly cap and rate cap)."""
-    stats, _ = _get_interrupt_stats()
+    stats, _ = _get_interrupt_stats(state)
     interrupts = stats.get("interrupts", 0)
     confirmed = stats.get("confirmed", 0)
-    max_per_hour = getattr(config, "MAX_INTERRUPTS_PER_HOUR", 5)
-    max_rate = getattr(config, "MAX_INTERRUPT_RATE", 0.30)
+    max_per_hour = _MAX_INTERRUPTS_PER_HOUR
+    max_rate = _MAX_INTERRUPT_RATE
     if interrupts >= max_per_hour:
         return False
     total = interrupts + confirmed
@@ -335,31 +630,43 @@ def _should_post_interrupted_signal():
     return True
 
 
-def _record_interrupt_event(kind):
-    """Update hourly stats and optionally last_signal_interrupted_at."""
+def _record_interrupt_event(kind, clear_pre_signal=False):
+    """Update hourly stats and optionally last_signal_interrupted_at.
+    The hour rollover happens inside the update pipeline, so no read is needed first.
+    clear_pre_signal=True folds _clear_pre_signal_state() into the same write.
+    """
     if _engine_state_coll is None:
         return
-    stats, hour_key = _get_interrupt_stats()
-    if kind == "interrupted":
-        stats["interrupts"] = stats.get("interrupts", 0) + 1
-    elif kind == "confirmed":
-        stats["confirmed"] = stats.get("confirmed", 0) + 1
-    updates = {"interrupt_stats": stats}
+    hour_key = datetime.now(BRT).strftime("%Y-%m-%d-%H")
+    inc_interrupts = 1 if kind == "interrupted" else 0
+    inc_confirmed = 1 if kind == "confirmed" else 0
+    updates = {
+        "interrupt_stats": {"$cond": [
+            {"$eq": ["$interrupt_stats.hour_key", hour_key]},
+            {
+                "hour_key": hour_key,
+                "interrupts": {"$add": [{"$ifNull": ["$interrupt_stats.interrupts", 0]}, inc_interrupts]},
+                "confirmed": {"$add": [{"$ifNull": ["$interrupt_stats.confirmed", 0]}, inc_confirmed]},
+            },
+            {"hour_key": hour_key, "interrupts": inc_interrupts, "confirmed": inc_confirmed},
+        ]},
+    }
     if kind == "interrupted":
         updates["last_signal_interrupted_at"] = datetime.now(timezone.utc)
+    pipeline = [{"$set": updates}]
+    if clear_pre_signal:
+        updates["pre_signal_sent"] = False
+        pipeline.append({"$unset": ["last_pre_signal_message_id", "last_pre_signal_message_id_2"]})
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": updates},
-            upsert=True,
-        )
+        _update_engine_state(pipeline)
     except Exception as e:
         logger.debug(f"_record_interrupt_event error: {e}")
 
 
-def _is_in_interrupted_cooldown():
+def _is_in_interrupted_cooldown(state=None):
     """True if in V2 interrupted cooldown (2 min after Signal Interrupted). Stub returns False if not implemented."""
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     last = state.get("last_signal_interrupted_at")
     if last is None:
         return False
@@ -367,20 +674,27 @@ def _is_in_interrupted_cooldown():
         if isinstance(last, datetime) and last.tzinfo is None:
             last = last.replace(tzinfo=timezone.utc)
         since = datetime.now(timezone.utc) - last
-        return since < timedelta(minutes=getattr(config, "INTERRUPTED_COOLDOWN_MINUTES", 2))
+        return since < timedelta(minutes=_INTERRUPTED_COOLDOWN_MINUTES)
     except Exception:
         return False
 
 
-def in_cooldown():
+def in_cooldown(state=None, latest_round_id=None):
     """
     True if we are in cooldown: last loss set cooldown_until_round_id and
     current latest round _id is still less than that.
+    state / latest_round_id: values the caller already has (engine_state cache / round window / DB if None).
     """
-    state = _get_engine_state()
+    if state is None:
+        state = _get_engine_state()
     until = state.get("cooldown_until_round_id")
     if until is None:
         return False
+    if latest_round_id is None and _round_window_loaded:
+        # on_new_round keeps the newest round id in memory; no query needed
+        latest_round_id = _latest_round_id
+    if latest_round_id is not None:
+        return latest_round_id < until
     coll = _get_rounds_collection()
     if coll is None:
         return False
@@ -403,101 +717,190 @@ def get_pattern_monitoring_data():
     """
     if active_signal_exists():
         return None
-    if in_cooldown():
-        return None
-    if is_in_volatility_cooldown():
+    state = _get_engine_state()
+    if in_cooldown(state):
         return None
-    recent = get_recent_rounds(10)
-    if len(recent) < 3:
+    if is_in_volatility_cooldown(state):
         return None
-    count = 0
-    for r in recent:
-        if r.get("multiplier", 0) < config.THRESHOLD:
-            count += 1
-        else:
-            break
+    _load_round_window()
+    count = _consecutive_under_threshold()
     if count < 3:
         return None
-    remaining = max(0, config.SEQUENCE_LENGTH - count)
+    remaining = max(0, _SEQUENCE_LENGTH - count)
     return (count, remaining)
 
 
-def check_trigger(recent_rounds):
+def check_trigger(state=None, has_active=None, latest_round_id=None):
     """
-    recent_rounds: list of last 8 rounds (newest first), each with 'multiplier'.
     Returns True if: last SEQUENCE_LENGTH rounds all < THRESHOLD, no active signal, not in cooldown.
+    state / has_active / latest_round_id: values already known to the caller (read from DB if None).
     """
-    if active_signal_exists():
+    if has_active is None:
+        has_active = active_signal_exists()
+    if has_active:
         return False
-    if in_cooldown():
-        return False
-    if is_in_volatility_cooldown():
+    if state is None:
+        state = _get_engine_state()
+    if in_cooldown(state, latest_round_id):
         return False
-    if is_session_closed():
+    if is_in_volatility_cooldown(state):
         return False
-    if len(recent_rounds) < config.SEQUENCE_LENGTH:
+    if is_session_closed(state):
         return False
-    last_six = recent_rounds[: config.SEQUENCE_LENGTH]
-    if all(r.get("multiplier", 0) < config.THRESHOLD for r in last_six):
-        return True
-    return False
+    _load_round_window()
+    sequence_mask = (1 << _SEQUENCE_LENGTH) - 1
+    return _under_threshold_mask & sequence_mask == sequence_mask
+
+
+def _max_signal_id():
+    """Highest integer signal _id stored (0 if none)."""
+    doc = _signals_coll.find_one({"_id": {"$type": "int"}}, {"_id": 1}, sort=[("_id", -1)])
+    return doc["_id"] if doc else 0
+
+
+def _seed_signal_counter():
+    """Make sure the signals counter is at least the current max signal _id. Runs once at init."""
+    try:
+        max_id = _max_signal_id()
+        # $max never moves the counter backwards if it is already ahead
+        _counters_coll.update_one(
+            {"_id": SIGNALS_COUNTER_ID},
+            {"$max": {"seq": max_id}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.debug(f"_seed_signal_counter error: {e}")
 
 
 def _next_signal_id():
-    if _signals_coll is None:
+    """Atomically reserve the next signal _id."""
+    if _counters_coll is None:
         return 1
     try:
-        doc = _signals_coll.find_one(sort=[("_id", -1)])
-        if doc and isinstance(doc.get("_id"), int):
-            return doc["_id"] + 1
-        return 1
+        counter = _counters_coll.find_one_and_update(
+            {"_id": SIGNALS_COUNTER_ID},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter["seq"]
     except Exception as e:
         logger.debug(f"_next_signal_id error: {e}")
         return 1
 
 
-def _today_str():
-    """Today's date in BRT (YYYY-MM-DD) for consistent daily_stats across timezones."""
-    return datetime.now(BRT).date().isoformat()
+# Bumped on every daily_stats counter write so readers can tell whether a snapshot is still current
+_daily_stats_revision = 0
 
 
-def _ensure_daily_stats():
-    """Ensure today's daily_stats row exists; create if not."""
-    if _daily_stats_coll is None:
-        return
-    today = _today_str()
-    try:
-        _daily_stats_coll.update_one(
-            {"_id": today},
-            {
-                "$setOnInsert": {
-                    "_id": today,
-                    "date": today,
-                    "wins": 0,
-                    "losses": 0,
-                    "signals_sent": 0,
-                    "today_wins": 0,
-                    "today_losses": 0,
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            },
-            upsert=True,
-        )
-    except Exception as e:
-        logger.debug(f"_ensure_daily_stats error: {e}")
+def daily_stats_revision():
+    """In-process revision of today's daily_stats counters (changes whenever this process writes them)."""
+    return _daily_stats_revision
+
+
+def _bump_daily_stats_revision():
+    global _daily_stats_revision
+    _daily_stats_revision += 1
+
+
+# (UTC hour number, BRT date string). BRT is a whole-hour offset from UTC, so its date
+# can only change on a UTC hour boundary and one conversion per hour is enough.
+_today_cache = (None, None)
+
+
+def _today_str(now=None):
+    """Today's date in BRT (YYYY-MM-DD) for consistent daily_stats across timezones.
+    now: aware datetime already taken by the caller (current time if None).
+    """
+    global _today_cache
+    if now is None:
+        now = datetime.now(timezone.utc)
+    hour = int(now.timestamp() // 3600)
+    cached_hour, cached_today = _today_cache
+    if cached_hour == hour:
+        return cached_today
+    today = now.astimezone(BRT).date().isoformat()
+    _today_cache = (hour, today)
+    return today
+
+
+# Initial values of a daily_stats row; every counter write fills in the missing ones itself (upsert, no extra read)
+DAILY_STATS_DEFAULTS = {
+    "wins": 0,
+    "losses": 0,
+    "signals_sent": 0,
+    "today_wins": 0,
+    "today_losses": 0,
+    "current_streak": 0,
+    "best_streak": 0,
+}
+
+
+def _daily_stats_defaults_stage(today):
+    """Pipeline-update stage acting like $setOnInsert: set date and default any missing counter.
+    emoji_tape is only started on a brand-new row (no updated_at yet): a row from before the tape existed keeps
+    it missing, so recaps fall back to scanning that day's signals instead of trusting a partial tape.
+    """
+    stage = {field: {"$ifNull": [f"${field}", {"$literal": default}]} for field, default in DAILY_STATS_DEFAULTS.items()}
+    stage["emoji_tape"] = {"$cond": [
+        {"$isArray": "$emoji_tape"},
+        "$emoji_tape",
+        {"$cond": [{"$eq": [{"$type": "$updated_at"}, "missing"]}, {"$literal": []}, "$$REMOVE"]},
+    ]}
+    stage["date"] = today
+    return {"$set": stage}
+
 
+def _append_emoji_tape(emoji):
+    """Append to emoji_tape only if this day's tape was started (see _daily_stats_defaults_stage)."""
+    return {"$cond": [
+        {"$isArray": "$emoji_tape"},
+        {"$concatArrays": ["$emoji_tape", [emoji]]},
+        "$$REMOVE",
+    ]}
 
-def create_signal(trigger_round_id, target):
+
+SIGNAL_INSERT_ATTEMPTS = 3
+
+
+def _insert_signal(doc):
+    """
+    Insert a signal whose Template 3 is already public, so it still gets resolved.
+    A duplicate _id (e.g. _next_signal_id fell back to 1) re-seeds the counter and retries with a fresh id,
+    never lower than max stored _id + 1 in case the counter itself is what failed.
+    Returns True once inserted.
+    """
+    for attempt in range(1, SIGNAL_INSERT_ATTEMPTS + 1):
+        try:
+            _signals_coll.insert_one(doc)
+            return True
+        except DuplicateKeyError as e:
+            logger.warning(f"create_signal duplicate id {doc['_id']} (attempt {attempt}): {e}")
+            _seed_signal_counter()
+            try:
+                doc["_id"] = max(_next_signal_id(), _max_signal_id() + 1)
+            except Exception as e:
+                logger.warning(f"create_signal id reallocation error: {e}")
+        except Exception as e:
+            logger.warning(f"create_signal insert error (attempt {attempt}): {e}")
+    logger.error(
+        f"create_signal could not store signal posted as telegram_message_id={doc.get('telegram_message_id')}, "
+        f"telegram_message_id_2={doc.get('telegram_message_id_2')}; it will not be resolved"
+    )
+    return False
+
+
+def create_signal(trigger_round_id, target, last_multiplier=None):
     """
     Create a new active signal. Increment daily signals_sent.
     trigger_round_id: _id of the round that triggered (first of the 6).
+    last_multiplier: newest round's multiplier, if the caller already has it (read from DB if None).
     """
     if _signals_coll is None:
         return None
-    _ensure_daily_stats()
     # Template 2 (Pre-Signal) was already sent earlier; here we send only Template 3 (on time with this round)
     now = datetime.now(timezone.utc)
-    today = _today_str()
+    today = _today_str(now)
     sig_id = _next_signal_id()
     doc = {
         "_id": sig_id,
@@ -510,44 +913,42 @@ def create_signal(trigger_round_id, target):
         "created_at": now,
         "resolved_at": None,
     }
+    # Send signal message (Template 3) first so the message ids go into the single insert (reply threading)
+    if last_multiplier is None:
+        last_multiplier = _newest_multiplier()
+    try:
+        msg_ids = _enqueue(telegram_service.send_signal, last_round=last_multiplier, target=target).result(
+            timeout=TELEGRAM_RESULT_TIMEOUT_SEC
+        )
+    except Exception as e:
+        # Still record the signal; results just won't reply to the signal message
+        logger.error(f"create_signal send error: {e}")
+        msg_ids = None
+    if msg_ids and msg_ids[0] is not None:
+        doc["telegram_message_id"] = msg_ids[0]
+        if msg_ids[1] is not None:
+            doc["telegram_message_id_2"] = msg_ids[1]
+    if not _insert_signal(doc):
+        return None
+    sig_id = doc["_id"]
     try:
-        _signals_coll.insert_one(doc)
-        # today_wins = signals_sent - today_losses (create/backfill today_wins explicitly)
-        stats_doc = _daily_stats_coll.find_one({"_id": today}) or {}
-        current_signals = stats_doc.get("signals_sent", 0)
-        current_today_losses = stats_doc.get("today_losses", 0)
-        new_signals_sent = current_signals + 1
-        today_wins_value = max(0, new_signals_sent - current_today_losses)
+        _set_active_signal(doc)
+        # today_wins = signals_sent - today_losses, computed server-side in the same write (no read first)
         _daily_stats_coll.update_one(
             {"_id": today},
-            {
-                "$inc": {"signals_sent": 1},
-                "$set": {
-                    "today_wins": today_wins_value,
-                    "updated_at": now,
-                },
-            },
+            [
+                _daily_stats_defaults_stage(today),
+                {"$set": {"signals_sent": {"$add": ["$signals_sent", 1]}}},
+                {"$set": {
+                    "today_wins": {"$max": [0, {"$subtract": ["$signals_sent", "$today_losses"]}]},
+                    "updated_at": "$$NOW",
+                }},
+            ],
             upsert=True,
         )
+        _bump_daily_stats_revision()
         logger.info(f"Signal created: id={sig_id}, trigger_round_id={trigger_round_id}, target={target}")
-        
-        # Send signal message (Template 3) and store message_id for reply threading
-        recent = get_recent_rounds(1)
-        last_round = recent[0].get("multiplier") if recent else 0
-        msg_ids = telegram_service.send_signal(last_round=last_round, target=target)
         _record_interrupt_event("confirmed")  # For interrupt rate governance (interrupts vs confirmed)
-        if msg_ids and msg_ids[0] is not None:
-            update_data = {"telegram_message_id": msg_ids[0]}
-            if msg_ids[1] is not None:
-                update_data["telegram_message_id_2"] = msg_ids[1]
-            _signals_coll.update_one(
-                {"_id": sig_id},
-                {"$set": update_data},
-            )
-            doc["telegram_message_id"] = msg_ids[0]
-            if msg_ids[1] is not None:
-                doc["telegram_message_id_2"] = msg_ids[1]
-        
         return doc
     except Exception as e:
         logger.error(f"create_signal error: {e}")
@@ -565,10 +966,13 @@ def resolve_signal(signal, round_data):
         logger.warning("resolve_signal: missing multiplier or target")
         return
 
+    # One clock read for every write of this resolution
+    now = datetime.now(timezone.utc)
+    today = _today_str(now)
     if multiplier >= target:
         # WIN (or recovery)
-        mark_won(signal, round_data)
-        increment_daily_wins()  # Increment BEFORE sending so Telegram shows correct stats
+        mark_won(signal, round_data, now)
+        increment_daily_wins(now, today)  # Increment BEFORE sending so Telegram shows correct stats
         if signal.get("gale_depth", 0) == 0:
             send_win_message(signal, round_data)
         else:
@@ -576,19 +980,21 @@ def resolve_signal(signal, round_data):
     else:
         # Did not hit target
         gale_depth = signal.get("gale_depth", 0)
-        if gale_depth < config.MAX_GALE:
+        if gale_depth < _MAX_GALE:
             new_depth = gale_depth + 1
             update_signal_gale(signal, new_depth)
-            send_gale_message(signal, new_depth)
+            send_gale_message(signal, new_depth, multiplier)
         else:
-            mark_lost(signal, round_data)
-            increment_daily_losses()  # Increment BEFORE sending so Telegram shows correct stats
+            mark_lost(signal, round_data, now)
+            increment_daily_losses(now, today)  # Increment BEFORE sending so Telegram shows correct stats
+            # Cooldown and streak reset share one engine_state write, flushed before the Telegram call
+            start_cooldown(_COOLDOWN_ROUNDS, round_data.get("_id"), extra_state={"consecutive_wins": 0})
             send_loss_message(signal, round_data)
-            start_cooldown(config.COOLDOWN_ROUNDS, round_data.get("_id"))
 
 
-def mark_won(signal, round_data):
-    now = datetime.now(timezone.utc)
+def mark_won(signal, round_data, now=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
     _signals_coll.update_one(
         {"_id": signal["_id"]},
         {
@@ -600,11 +1006,13 @@ def mark_won(signal, round_data):
             }
         },
     )
+    _set_active_signal(None)
     logger.info(f"Signal {signal['_id']} WON at multiplier {round_data.get('multiplier')}")
 
 
-def mark_lost(signal, round_data):
-    now = datetime.now(timezone.utc)
+def mark_lost(signal, round_data, now=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
     _signals_coll.update_one(
         {"_id": signal["_id"]},
         {
@@ -616,6 +1024,7 @@ def mark_lost(signal, round_data):
             }
         },
     )
+    _set_active_signal(None)
     logger.info(f"Signal {signal['_id']} LOST at multiplier {round_data.get('multiplier')}")
 
 
@@ -625,40 +1034,81 @@ def update_signal_gale(signal, new_depth):
         {"_id": signal["_id"]},
         {"$set": {"status": status, "gale_depth": new_depth}},
     )
+    cached = _active_signal_cache
+    if cached is not None and cached.get("_id") == signal["_id"]:
+        cached["status"] = status
+        cached["gale_depth"] = new_depth
     logger.info(f"Signal {signal['_id']} escalated to gale {new_depth}")
 
 
-def increment_daily_wins():
-    _ensure_daily_stats()
-    today = _today_str()
-    now = datetime.now(timezone.utc)
-    _daily_stats_coll.update_one(
+def increment_daily_wins(now=None, today=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if today is None:
+        today = _today_str(now)
+    # Pipeline update so best_streak can be computed from the incremented current_streak in the same write.
+    # emoji_tape / current_streak / best_streak let recaps skip re-scanning the day's signals.
+    doc = _daily_stats_coll.find_one_and_update(
         {"_id": today},
-        {"$inc": {"wins": 1}, "$set": {"updated_at": now}},
+        [
+            _daily_stats_defaults_stage(today),
+            {"$set": {
+                "wins": {"$add": ["$wins", 1]},
+                "emoji_tape": _append_emoji_tape(RESULT_EMOJI_WON),
+                "current_streak": {"$add": ["$current_streak", 1]},
+                "updated_at": "$$NOW",
+            }},
+            {"$set": {"best_streak": {"$max": ["$best_streak", "$current_streak"]}}},
+        ],
+        projection=TODAY_STATS_PROJECTION,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
+    _cache_today_stats(today, doc)
+    _bump_daily_stats_revision()
 
 
-def increment_daily_losses():
-    _ensure_daily_stats()
-    today = _today_str()
-    now = datetime.now(timezone.utc)
-    # today_wins = signals_sent - today_losses (create/backfill today_wins explicitly)
-    stats_doc = _daily_stats_coll.find_one({"_id": today}) or {}
-    current_signals = stats_doc.get("signals_sent", 0)
-    current_today_losses = stats_doc.get("today_losses", 0)
-    new_today_losses = current_today_losses + 1
-    today_wins_value = current_signals - new_today_losses
-    _daily_stats_coll.update_one(
+def increment_daily_losses(now=None, today=None):
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if today is None:
+        today = _today_str(now)
+    # today_wins = signals_sent - today_losses, computed server-side in the same write (no read first)
+    doc = _daily_stats_coll.find_one_and_update(
         {"_id": today},
-        {
-            "$inc": {"losses": 1, "today_losses": 1},
-            "$set": {
-                "today_wins": max(0, today_wins_value),
-                "updated_at": now,
-            },
-        },
+        [
+            _daily_stats_defaults_stage(today),
+            {"$set": {
+                "losses": {"$add": ["$losses", 1]},
+                "today_losses": {"$add": ["$today_losses", 1]},
+                "emoji_tape": _append_emoji_tape(RESULT_EMOJI_LOST),
+                "current_streak": 0,
+                "updated_at": "$$NOW",
+            }},
+            {"$set": {
+                "today_wins": {"$max": [0, {"$subtract": ["$signals_sent", "$today_losses"]}]},
+            }},
+        ],
+        projection=TODAY_STATS_PROJECTION,
         upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
+    _cache_today_stats(today, doc)
+    _bump_daily_stats_revision()
+
+
+# Today's wins/losses as last written by this process: (date, {"wins", "losses"}).
+# signal_engine is the only writer of these counters, so the copy returned by each write stays current.
+TODAY_STATS_PROJECTION = {"_id": 0, "wins": 1, "losses": 1}
+_today_stats_cache = (None, None)
+
+
+def _cache_today_stats(today, doc):
+    global _today_stats_cache
+    doc = doc or {}
+    stats = {"wins": doc.get("wins", 0), "losses": doc.get("losses", 0)}
+    _today_stats_cache = (today, stats)
+    return stats
 
 
 def reset_daily_stats_after_two_losses():
@@ -670,30 +1120,36 @@ def reset_daily_stats_after_two_losses():
     if _daily_stats_coll is None:
         return
     today = _today_str()
-    now = datetime.now(timezone.utc)
     try:
         _daily_stats_coll.update_one(
             {"_id": today},
-            {"$set": {"wins": 0, "losses": 1, "updated_at": now}},
+            {"$set": {"wins": 0, "losses": 1}, "$currentDate": {"updated_at": True}},
             upsert=True,
         )
+        _cache_today_stats(today, {"wins": 0, "losses": 1})
+        _bump_daily_stats_revision()
         logger.info("Daily stats reset after 2 losses in a row (wins=0, losses=1)")
     except Exception as e:
         logger.debug(f"reset_daily_stats_after_two_losses error: {e}")
 
 
-def start_cooldown(rounds_count, result_round_id):
-    """Start cooldown: no new signal until result_round_id + rounds_count."""
-    if result_round_id is None or _engine_state_coll is None:
+def start_cooldown(rounds_count, result_round_id, extra_state=None):
+    """Start cooldown: no new signal until result_round_id + rounds_count.
+    extra_state: other engine_state fields to $set in the same write (still written without a round id).
+    """
+    if _engine_state_coll is None:
+        return
+    updates = dict(extra_state or {})
+    until = None
+    if result_round_id is not None:
+        until = result_round_id + rounds_count
+        updates["cooldown_until_round_id"] = until
+    if not updates:
         return
-    until = result_round_id + rounds_count
     try:
-        _engine_state_coll.update_one(
-            {"_id": "state"},
-            {"$set": {"cooldown_until_round_id": until}},
-            upsert=True,
-        )
-        logger.info(f"Cooldown started until round_id >= {until}")
+        _update_engine_state({"$set": updates})
+        if until is not None:
+            logger.info(f"Cooldown started until round_id >= {until}")
     except Exception as e:
         logger.debug(f"start_cooldown error: {e}")
 
@@ -704,66 +1160,42 @@ def start_cooldown(rounds_count, result_round_id):
 _current_streak = 0
 _last_streak_celebration = 0
 
-STREAK_MILESTONES_BASE = [3, 5, 7, 10]  # 3, 5, 7, 10, then every 5: 15, 20, 25, 30...
-
-
-def _is_streak_milestone(count):
-    """True if count is a milestone: 3, 5, 7, 10, 15, 20, 25, 30..."""
-    if count in STREAK_MILESTONES_BASE:
-        return True
-    if count >= 15 and count % 5 == 0:
-        return True
-    return False
+STREAK_MILESTONES_BASE = frozenset({3, 5, 7, 10})  # 3, 5, 7, 10, then every 5: 15, 20, 25, 30...
 
 
-def _persist_consecutive_wins(count):
-    """Persist consecutive_wins to engine_state (state manager)."""
+def _increment_consecutive_wins():
+    """
+    Atomically add one win to engine_state.consecutive_wins and return the new streak.
+    The stored counter survives restarts (reset to 0 on stop loss by resolve_signal).
+    """
     if _engine_state_coll is None:
-        return
+        return _current_streak + 1
     try:
-        _engine_state_coll.update_one(
+        state = _engine_state_coll.find_one_and_update(
             {"_id": "state"},
-            {"$set": {"consecutive_wins": count}},
+            {"$inc": {"consecutive_wins": 1}},
+            projection={"consecutive_wins": 1},
             upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
+        _invalidate_engine_state()
+        return state["consecutive_wins"]
     except Exception as e:
-        logger.debug(f"_persist_consecutive_wins error: {e}")
-
-
-def _get_consecutive_wins_from_db():
-    """
-    Get current consecutive win streak from resolved signals (most recent first).
-    Used to restore streak after process restart.
-    """
-    if _signals_coll is None:
-        return 0
-    try:
-        cursor = _signals_coll.find(
-            {"status": {"$in": [STATUS_WON, STATUS_LOST]}},
-            {"status": 1},
-        ).sort("resolved_at", -1).limit(50)
-        count = 0
-        for doc in cursor:
-            if doc.get("status") == STATUS_WON:
-                count += 1
-            else:
-                break
-        return count
-    except Exception as e:
-        logger.debug(f"_get_consecutive_wins_from_db error: {e}")
-        return 0
+        logger.debug(f"_increment_consecutive_wins error: {e}")
+        return _current_streak + 1
 
 
 def _get_today_stats():
-    """Get today's daily_stats (wins, losses)."""
+    """Get today's daily_stats (wins, losses). Served from the copy kept by the counter writes when current."""
     if _daily_stats_coll is None:
         return {"wins": 0, "losses": 0}
     today = _today_str()
+    cached_date, cached_stats = _today_stats_cache
+    if cached_date == today:
+        return dict(cached_stats)
     try:
-        doc = _daily_stats_coll.find_one({"_id": today})
-        if doc:
-            return {"wins": doc.get("wins", 0), "losses": doc.get("losses", 0)}
-        return {"wins": 0, "losses": 0}
+        doc = _daily_stats_coll.find_one({"_id": today}, TODAY_STATS_PROJECTION)
+        return dict(_cache_today_stats(today, doc))
     except Exception as e:
         logger.debug(f"_get_today_stats error: {e}")
         return {"wins": 0, "losses": 0}
@@ -774,15 +1206,11 @@ def send_win_message(signal, round_data):
     global _current_streak
     logger.info(f"[WIN] Signal {signal['_id']} | target={signal['target']} | result={round_data.get('multiplier')}")
     
-    # Restore streak from DB if needed (e.g. after process restart); else increment
-    if _current_streak == 0:
-        _current_streak = _get_consecutive_wins_from_db()  # Already includes this win (mark_won was called)
-    else:
-        _current_streak += 1
-    _persist_consecutive_wins(_current_streak)
+    _current_streak = _increment_consecutive_wins()
 
     stats = _get_today_stats()
-    telegram_service.send_win_result(
+    _enqueue(
+        telegram_service.send_win_result,
         result=round_data.get("multiplier"),
         target=signal["target"],
         today_wins=stats["wins"],
@@ -801,15 +1229,12 @@ def send_recovery_message(signal, round_data):
         f"[RECOVERED] Signal {signal['_id']} gale_depth={signal.get('gale_depth')} | "
         f"result={round_data.get('multiplier')}"
     )
-    
-    if _current_streak == 0:
-        _current_streak = _get_consecutive_wins_from_db()  # Already includes this win (mark_won was called)
-    else:
-        _current_streak += 1
-    _persist_consecutive_wins(_current_streak)
+
+    _current_streak = _increment_consecutive_wins()
 
     stats = _get_today_stats()
-    telegram_service.send_gale_recovery(
+    _enqueue(
+        telegram_service.send_gale_recovery,
         gale_depth=signal.get("gale_depth"),
         result=round_data.get("multiplier"),
         target=signal["target"],
@@ -822,28 +1247,30 @@ def send_recovery_message(signal, round_data):
     _check_streak_celebration()
 
 
-def send_gale_message(signal, new_depth):
+def send_gale_message(signal, new_depth, last_mult=None):
     """Send gale escalation message (gale 1 or gale 2)."""
     logger.info(f"[GALE] Signal {signal['_id']} escalated to gale {new_depth}")
     
-    # Get the last round multiplier (result that missed)
-    recent = get_recent_rounds(1)
-    last_mult = recent[0].get("multiplier") if recent else 0
+    # Last round multiplier (result that missed); resolve_signal passes the round it just resolved
+    if last_mult is None:
+        last_mult = _newest_multiplier()
     
     reply_to = signal.get("telegram_message_id")
     reply_to_2 = signal.get("telegram_message_id_2")
     if new_depth == 1:
-        telegram_service.send_gale1_trigger(
+        _enqueue(
+            telegram_service.send_gale1_trigger,
             result=last_mult, target=signal["target"], reply_to_message_id=reply_to, reply_to_message_id_2=reply_to_2
         )
     elif new_depth == 2:
-        telegram_service.send_gale2_trigger(
+        _enqueue(
+            telegram_service.send_gale2_trigger,
             result=last_mult, target=signal["target"], reply_to_message_id=reply_to, reply_to_message_id_2=reply_to_2
         )
 
 
 def send_loss_message(signal, round_data):
-    """Send loss message (gale 2 failed). Reset consecutive_wins on stop loss."""
+    """Send loss message (gale 2 failed). Reset in-memory streak on stop loss (resolve_signal persists it)."""
     global _current_streak, _last_streak_celebration  # Reset both on loss
     logger.info(
         f"[LOSS] Signal {signal['_id']} | target={signal['target']} | "
@@ -852,10 +1279,10 @@ def send_loss_message(signal, round_data):
     
     _current_streak = 0
     _last_streak_celebration = 0
-    _persist_consecutive_wins(0)
     
     stats = _get_today_stats()
-    telegram_service.send_loss_message_telegram(
+    _enqueue(
+        telegram_service.send_loss_message_telegram,
         result=round_data.get("multiplier"),
         today_wins=stats["wins"],
         today_losses=stats["losses"],
@@ -870,9 +1297,11 @@ def send_loss_message(signal, round_data):
 def _check_streak_celebration():
     """Check if we hit a streak milestone (3, 5, 7, 10, 15, 20, 25...) and send alert."""
     global _last_streak_celebration
-    if _is_streak_milestone(_current_streak) and _current_streak > _last_streak_celebration:
-        telegram_service.send_streak_celebration(_current_streak)
-        _last_streak_celebration = _current_streak
+    count = _current_streak
+    is_milestone = count in STREAK_MILESTONES_BASE or (count >= 15 and count % 5 == 0)
+    if is_milestone and count > _last_streak_celebration:
+        _enqueue(telegram_service.send_streak_celebration, count)
+        _last_streak_celebration = count
 
 
 def on_new_round(round_data):
@@ -883,97 +1312,93 @@ def on_new_round(round_data):
     - Check volatility trigger (3 rounds < 1.20x) -> enter cooldown.
     - Else if trigger condition met and not in cooldowns, create a new signal.
     """
+    global _last_pre_signal_mono
     if _db is None:
         return
-    recent = get_recent_rounds(8)
+    if not _round_window_loaded:
+        _load_round_window(round_data.get("_id"))  # Up to and including this round
+    elif _latest_round_id is None or round_data.get("_id", 0) > _latest_round_id:
+        _push_round(round_data.get("_id"), round_data.get("multiplier"))
     active = get_active_signal()
 
     if active:
         resolve_signal(active, round_data)
         return
+    # Read engine_state once (fresh); the checks below reuse it instead of each issuing a find_one
+    state = _get_engine_state(force=True)
+    latest_round_id = _latest_round_id
     # Volatility cooldown: 3 consecutive rounds < 1.20x -> pause signaling 5-8 min
-    if _check_volatility_trigger(recent) and not is_in_volatility_cooldown():
+    in_volatility_cooldown = is_in_volatility_cooldown(state)
+    if _check_volatility_trigger() and not in_volatility_cooldown:
         _enter_volatility_cooldown()
         return
-    if is_in_volatility_cooldown():
+    if in_volatility_cooldown:
         return
-    if in_cooldown() or is_session_closed():
+    if in_cooldown(state, latest_round_id) or is_session_closed(state):
         return
-    consecutive = _consecutive_under_threshold(recent)
-    # Current round multiplier (for cancel logic after pre-signal)
-    current_mult = round_data.get("multiplier")
-    try:
-        current_mult_val = float(current_mult)
-    except (TypeError, ValueError):
-        current_mult_val = 0.0
+    consecutive = _consecutive_under_threshold()
+    # Current round multiplier (for cancel logic after pre-signal); log_monitor stores it as a float already
+    current_mult_val = round_data.get("multiplier") or 0.0
 
     # If we already sent Template 2 and the next round breaks the pattern (> THRESHOLD),
     # optionally post "Sinal cancelado" (governed by hourly cap + rate) and reset the pre-signal flag.
     # When we skip posting cancel (governance), remove the "Analisando" message we just sent.
-    if _pre_signal_sent_for_run() and current_mult_val > config.THRESHOLD and consecutive < config.SEQUENCE_LENGTH:
-        state = _get_engine_state()
+    pre_signal_sent = _pre_signal_sent_for_run(state)
+    if pre_signal_sent and current_mult_val > _THRESHOLD and consecutive < _SEQUENCE_LENGTH:
         pre_msg_id = state.get("last_pre_signal_message_id")
         pre_msg_id_2 = state.get("last_pre_signal_message_id_2")
-        if _should_post_interrupted_signal():
-            telegram_service.send_signal_cancelled()
-            _record_interrupt_event("interrupted")
+        # Either way pre_signal_sent + last_pre_signal_message_id + last_pre_signal_message_id_2 are cleared
+        if _should_post_interrupted_signal(state):
+            _enqueue(telegram_service.send_signal_cancelled)
+            _record_interrupt_event("interrupted", clear_pre_signal=True)
         else:
             # Don't post cancel — delete the "Analisando" message so channel is consistent
             if pre_msg_id is not None:
-                telegram_service.delete_message(pre_msg_id, pre_msg_id_2)
-        _clear_pre_signal_state()  # pre_signal_sent + last_pre_signal_message_id + last_pre_signal_message_id_2
+                _enqueue(telegram_service.delete_message, pre_msg_id, pre_msg_id_2)
+            _clear_pre_signal_state()
         return
 
     # Trigger fires (3 consecutive < THRESHOLD): send Template 3 ONLY if we already sent Template 2
     # (All SINAL CONFIRMADO must occur after a pre-signal.)
-    if check_trigger(recent):
-        if not _pre_signal_sent_for_run():
+    if check_trigger(state, has_active=False, latest_round_id=latest_round_id):
+        if not pre_signal_sent:
             # Skip this trigger — no pre-signal was sent; do not post SINAL CONFIRMADO
+            _notify_pattern_eligible(consecutive)
             return
         _clear_pre_signal_state()
-        trigger_round_id = recent[0]["_id"] if recent else round_data.get("_id")
-        create_signal(trigger_round_id, config.TARGET_CASHOUT)
+        trigger_round_id = latest_round_id if latest_round_id is not None else round_data.get("_id")
+        create_signal(trigger_round_id, _TARGET_CASHOUT, last_multiplier=_latest_multiplier)
         return
     # One round before trigger (2 consecutive): send Template 2 once, unless in cooldown or too soon
-    if consecutive == 2 and not _pre_signal_sent_for_run():
-        if _is_in_interrupted_cooldown():
+    if consecutive == 2 and not pre_signal_sent:
+        if _is_in_interrupted_cooldown(state):
             return  # No new "Analisando" for 2 min after a cancel — reduces rapid repeat
-        state = _get_engine_state()
-        last_pre = state.get("last_pre_signal_at")
-        min_interval = getattr(config, "PRE_SIGNAL_MIN_INTERVAL_SEC", 90)
-        if last_pre is not None:
-            try:
-                if isinstance(last_pre, datetime) and last_pre.tzinfo is None:
-                    last_pre = last_pre.replace(tzinfo=timezone.utc)
-                if (datetime.now(timezone.utc) - last_pre).total_seconds() < min_interval:
-                    return  # Throttle: don't flood Analisando
-            except Exception:
-                pass
-        msg_ids = telegram_service.send_pre_signal_analyzing()
-        _set_pre_signal_sent(True)
+        if _pre_signal_throttled(state):
+            return  # Throttle: don't flood Analisando
+        try:
+            msg_ids = _enqueue(telegram_service.send_pre_signal_analyzing).result(timeout=TELEGRAM_RESULT_TIMEOUT_SEC)
+        except Exception as e:
+            # Still mark the run as pre-signalled (a timed-out send may yet post); only the ids are missing
+            logger.error(f"pre-signal send error: {e}")
+            msg_ids = None
+        _last_pre_signal_mono = monotonic()
         if _engine_state_coll is not None:
             try:
-                updates = {"last_pre_signal_at": datetime.now(timezone.utc)}
+                # Flag, timestamp and message ids land in one write
+                updates = {"pre_signal_sent": True, "last_pre_signal_at": datetime.now(timezone.utc)}
                 if msg_ids and msg_ids[0] is not None:
                     updates["last_pre_signal_message_id"] = msg_ids[0]
                 if msg_ids and msg_ids[1] is not None:
                     updates["last_pre_signal_message_id_2"] = msg_ids[1]
-                _engine_state_coll.update_one(
-                    {"_id": "state"},
-                    {"$set": updates},
-                    upsert=True,
-                )
+                _update_engine_state({"$set": updates})
             except Exception as e:
-                logger.debug(f"last_pre_signal_at / last_pre_signal_message_id update error: {e}")
+                logger.debug(f"pre_signal_sent / last_pre_signal_* update error: {e}")
     if consecutive < 2:
-        _set_pre_signal_sent(False)
-        # Clear stored Analisando message_id when pattern resets so we don't delete wrong message
-        if _engine_state_coll is not None:
-            try:
-                _engine_state_coll.update_one(
-                    {"_id": "state"},
-                    {"$unset": {"last_pre_signal_message_id": "", "last_pre_signal_message_id_2": ""}},
-                    upsert=False,
-                )
-            except Exception:
-                pass
+        # Pattern reset: clear pre_signal_sent and the stored Analisando message ids (so we don't delete the
+        # wrong message later). Most rounds have nothing to clear, so only write when the snapshot shows something.
+        if (
+            state.get("pre_signal_sent")
+            or "last_pre_signal_message_id" in state
+            or "last_pre_signal_message_id_2" in state
+        ):
+            _clear_pre_signal_state()
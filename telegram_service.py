@@ -6,14 +6,86 @@ V2: Jitter/humanization - random delay, emoji variation, phrase rotation.
 """
 import logging
 import random
+import threading
 import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import config
 
 logger = logging.getLogger(__name__)
 
 _message_sent_callback = None
+_session = None
+_api_urls = {}
+_secondary_executor = None
+
+# Humanization RNG (send jitter, emoji/phrase picks), independent of the shared module-level one
+_rng = random.Random()
+
+
+def _get_session():
+    """Shared HTTP session so TCP/TLS connections to api.telegram.org are reused across sends."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        # Retry covers connection errors and idempotent requests only; POSTs are not re-sent on
+        # 5xx/429 so a message that reached Telegram is never posted twice.
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry))
+        _session = session
+    return _session
+
+
+def _api_url(bot_token, method):
+    """Bot API endpoint for (token, method), built once and reused on every send."""
+    key = (bot_token, method)
+    url = _api_urls.get(key)
+    if url is None:
+        url = _api_urls[key] = f"https://api.telegram.org/bot{bot_token}/{method}"
+    return url
+
+
+class TokenBucket:
+    """Thread-safe token bucket: consume() blocks until a token is available."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        # Tokens are reserved under the lock; sleep outside it so other callers can queue behind us
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Telegram limits: ~30 messages/s per bot overall, ~1 message/s per chat.
+# Deletes and pins only draw from the global bucket; they are not new messages in the chat.
+_global_bucket = TokenBucket(rate=30, capacity=30)
+_chat_buckets = {}
+_chat_buckets_lock = threading.Lock()
+
+
+def _throttle(chat_id):
+    """Pace sends proactively instead of hitting 429 and backing off."""
+    with _chat_buckets_lock:
+        bucket = _chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = _chat_buckets[chat_id] = TokenBucket(rate=1, capacity=1)
+    _global_bucket.consume()
+    bucket.consume()
 
 
 def register_message_sent_callback(callback):
@@ -23,13 +95,15 @@ def register_message_sent_callback(callback):
 
 
 def init():
-    """Initialize Telegram service (validates config)."""
+    """Initialize Telegram service (validates config, opens the shared HTTP session and secondary sender)."""
     if not config.TELEGRAM_ENABLED:
         logger.warning("Telegram not configured (missing BOT_TOKEN or CHANNEL_ID). Messages will be logged only.")
         return False
+    _get_session()
     channels = [config.TELEGRAM_CHANNEL_ID]
     if config.TELEGRAM_ENABLED_2:
         channels.append(config.TELEGRAM_CHANNEL_ID_2)
+        _get_secondary_executor()
     logger.info(f"Telegram initialized for channel(s): {', '.join(channels)}")
     return True
 
@@ -37,19 +111,18 @@ def init():
 def _send_to_single_channel(bot_token, channel_id, text, reply_to_message_id=None, reply_markup=None):
     """Helper function to send message to a single Telegram channel.
     Returns message_id on success, None on failure."""
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {
-        "chat_id": channel_id,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": False,
-    }
+    url = _api_url(bot_token, "sendMessage")
+    payload = {"chat_id": channel_id, "text": text}
+    # Only ask Telegram to HTML-parse bodies that carry markup; link previews stay on (the API default)
+    if "<" in text or "&" in text:
+        payload["parse_mode"] = "HTML"
     if reply_to_message_id is not None:
         payload["reply_to_message_id"] = int(reply_to_message_id)
     if reply_markup is not None:
         payload["reply_markup"] = reply_markup
+    _throttle(channel_id)
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = _get_session().post(url, json=payload, timeout=10)
         if resp.ok:
             data = resp.json()
             return data.get("result", {}).get("message_id")
@@ -66,10 +139,11 @@ def delete_message(message_id, message_id_2=None):
     Returns True if at least one deletion succeeded, False otherwise."""
     success = False
     if config.TELEGRAM_ENABLED and message_id is not None:
-        url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/deleteMessage"
+        url = _api_url(config.TELEGRAM_BOT_TOKEN, "deleteMessage")
         payload = {"chat_id": config.TELEGRAM_CHANNEL_ID, "message_id": int(message_id)}
+        _global_bucket.consume()
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = _get_session().post(url, json=payload, timeout=10)
             if resp.ok:
                 logger.info("Telegram message deleted from primary channel")
                 success = True
@@ -79,10 +153,11 @@ def delete_message(message_id, message_id_2=None):
             logger.error(f"Failed to delete Telegram message from primary channel: {e}")
     
     if config.TELEGRAM_ENABLED_2 and message_id_2 is not None:
-        url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN_2}/deleteMessage"
+        url = _api_url(config.TELEGRAM_BOT_TOKEN_2, "deleteMessage")
         payload = {"chat_id": config.TELEGRAM_CHANNEL_ID_2, "message_id": int(message_id_2)}
+        _global_bucket.consume()
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = _get_session().post(url, json=payload, timeout=10)
             if resp.ok:
                 logger.info("Telegram message deleted from secondary channel")
                 success = True
@@ -110,43 +185,15 @@ def send_message(text, reply_to_message_id=None, reply_to_message_id_2=None, rep
         Primary channel message_id (for backward compatibility)
         Use send_message_with_both_ids() to get both message IDs
     """
-    if not config.TELEGRAM_ENABLED:
-        logger.info(f"[TELEGRAM DISABLED] Would send:\n{text}")
-        return None
-    
-    time.sleep(random.uniform(0.5, 1.5))
-    
-    # Send to primary channel
-    primary_msg_id = None
-    if config.TELEGRAM_ENABLED:
-        primary_msg_id = _send_to_single_channel(
-            config.TELEGRAM_BOT_TOKEN,
-            config.TELEGRAM_CHANNEL_ID,
-            text,
-            reply_to_message_id,
-            reply_markup
-        )
-    
-    # Send to secondary channel (if configured) - now supports reply threading
-    secondary_msg_id = None
-    if config.TELEGRAM_ENABLED_2:
-        secondary_msg_id = _send_to_single_channel(
-            config.TELEGRAM_BOT_TOKEN_2,
-            config.TELEGRAM_CHANNEL_ID_2,
-            text,
-            reply_to_message_id_2,  # Now supports reply threading for secondary channel
-            reply_markup  # But include buttons if provided
-        )
-    
-    if primary_msg_id:
-        logger.info("Message sent to Telegram channel(s)")
-        if _message_sent_callback:
-            try:
-                _message_sent_callback()
-            except Exception as e:
-                logger.debug(f"message_sent_callback error: {e}")
-    
-    return primary_msg_id
+    return send_message_with_both_ids(text, reply_to_message_id, reply_to_message_id_2, reply_markup)[0]
+
+
+def _get_secondary_executor():
+    """Single worker that posts to the secondary channel while the primary post is in flight."""
+    global _secondary_executor
+    if _secondary_executor is None:
+        _secondary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telegram-secondary")
+    return _secondary_executor
 
 
 def send_message_with_both_ids(text, reply_to_message_id=None, reply_to_message_id_2=None, reply_markup=None):
@@ -157,30 +204,36 @@ def send_message_with_both_ids(text, reply_to_message_id=None, reply_to_message_
         logger.info(f"[TELEGRAM DISABLED] Would send:\n{text}")
         return (None, None)
     
-    time.sleep(random.uniform(0.5, 1.5))
-    
-    # Send to primary channel
-    primary_msg_id = None
-    if config.TELEGRAM_ENABLED:
-        primary_msg_id = _send_to_single_channel(
-            config.TELEGRAM_BOT_TOKEN,
-            config.TELEGRAM_CHANNEL_ID,
-            text,
-            reply_to_message_id,
-            reply_markup
-        )
+    time.sleep(_rng.uniform(0.5, 1.5))
     
-    # Send to secondary channel (if configured) - now supports reply threading
-    secondary_msg_id = None
+    # Secondary channel (if configured) goes out on its own connection while the primary POST is in flight;
+    # each channel threads replies with its own message ids
+    secondary_future = None
     if config.TELEGRAM_ENABLED_2:
-        secondary_msg_id = _send_to_single_channel(
+        secondary_future = _get_secondary_executor().submit(
+            _send_to_single_channel,
             config.TELEGRAM_BOT_TOKEN_2,
             config.TELEGRAM_CHANNEL_ID_2,
             text,
-            reply_to_message_id_2,  # Now supports reply threading for secondary channel
-            reply_markup  # But include buttons if provided
+            reply_to_message_id_2,
+            reply_markup
         )
     
+    primary_msg_id = _send_to_single_channel(
+        config.TELEGRAM_BOT_TOKEN,
+        config.TELEGRAM_CHANNEL_ID,
+        text,
+        reply_to_message_id,
+        reply_markup
+    )
+    
+    secondary_msg_id = None
+    if secondary_future is not None:
+        try:
+            secondary_msg_id = secondary_future.result()
+        except Exception as e:
+            logger.error(f"Failed to send Telegram message to secondary channel: {e}")
+    
     if primary_msg_id:
         logger.info("Message sent to Telegram channel(s)")
         if _message_sent_callback:
@@ -197,15 +250,14 @@ def format_currency(value):
     return f"{value:.2f}"
 
 
-def _link_button():
-    """Return the affiliate link formatted for messages."""
-    return f"<a href='{config.AFFILIATE_LINK}'>🎰 APOSTE AGORA!</a>"
+# Affiliate anchor appended to most templates; config is fixed at import so build it once
+_LINK_BUTTON = f"<a href='{config.AFFILIATE_LINK}'>🎰 APOSTE AGORA!</a>"
+_WELCOME_LINK = config.AFFILIATE_LINK or "https://zamba.bet/games/spribe/aviator?o=login"
 
 
 def _welcome_message_text():
     """Return the pinned welcome message (CHANGE 12). Uses AFFILIATE_LINK."""
-    link = config.AFFILIATE_LINK or "https://zamba.bet/games/spribe/aviator?o=login"
-    link_tag = f"<a href='{link}'>JOGUE AQUI</a>"
+    link_tag = f"<a href='{_WELCOME_LINK}'>JOGUE AQUI</a>"
     return f"""🎰 BEM-VINDO AO SINAL AVIATOR 🎰
 
 🧠 Nosso algoritmo analisa padrões em tempo real e envia sinais de alta probabilidade para o Aviator.
@@ -230,22 +282,23 @@ def _welcome_message_text():
 Bons lucros! 💰"""
 
 
+_WELCOME_TEXT = _welcome_message_text()
+# Inline keyboard button "COMEÇAR AGORA" linking to affiliate
+_WELCOME_MARKUP = {
+    "inline_keyboard": [
+        [
+            {
+                "text": "🚀 COMEÇAR AGORA",
+                "url": _WELCOME_LINK
+            }
+        ]
+    ]
+}
+
+
 def send_welcome_message():
     """Send the pinned welcome message to the channel with inline button. Returns message_id or None."""
-    text = _welcome_message_text()
-    # Create inline keyboard button "COMEÇAR AGORA" linking to affiliate
-    link = config.AFFILIATE_LINK or "https://zamba.bet/games/spribe/aviator?o=login"
-    reply_markup = {
-        "inline_keyboard": [
-            [
-                {
-                    "text": "🚀 COMEÇAR AGORA",
-                    "url": link
-                }
-            ]
-        ]
-    }
-    return send_message(text, reply_markup=reply_markup)
+    return send_message(_WELCOME_TEXT, reply_markup=_WELCOME_MARKUP)
 
 
 def pin_chat_message(message_id, message_id_2=None):
@@ -254,13 +307,14 @@ def pin_chat_message(message_id, message_id_2=None):
     Returns True if at least one pin succeeded."""
     success = False
     if config.TELEGRAM_ENABLED and message_id:
-        url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/pinChatMessage"
+        url = _api_url(config.TELEGRAM_BOT_TOKEN, "pinChatMessage")
         payload = {
             "chat_id": config.TELEGRAM_CHANNEL_ID,
             "message_id": int(message_id),
         }
+        _global_bucket.consume()
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = _get_session().post(url, json=payload, timeout=10)
             if resp.ok:
                 logger.info("Message pinned in primary channel")
                 success = True
@@ -270,13 +324,14 @@ def pin_chat_message(message_id, message_id_2=None):
             logger.error(f"Failed to pin Telegram message in primary channel: {e}")
     
     if config.TELEGRAM_ENABLED_2 and message_id_2:
-        url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN_2}/pinChatMessage"
+        url = _api_url(config.TELEGRAM_BOT_TOKEN_2, "pinChatMessage")
         payload = {
             "chat_id": config.TELEGRAM_CHANNEL_ID_2,
             "message_id": int(message_id_2),
         }
+        _global_bucket.consume()
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = _get_session().post(url, json=payload, timeout=10)
             if resp.ok:
                 logger.info("Message pinned in secondary channel")
                 success = True
@@ -323,7 +378,7 @@ Sinais começando agora!
 
 Bora lucrar hoje! 💪
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
@@ -347,48 +402,49 @@ def send_keep_alive_message(variant_index):
         send_message(text)
 
 
-def send_cooldown_mode_message():
-    """Send cooldown mode message when 3 consecutive rounds < 1.20x detected."""
-    text = """📉 MODO COOLDOWN 📉
+COOLDOWN_MODE_TEXT = """📉 MODO COOLDOWN 📉
 
 3 rounds seguidos abaixo de 1.20x detectados.
 
 Algoritmo em pausa para proteção da banca.
 
 Retornamos quando o mercado estabilizar. ⏳"""
-    send_message(text)
+
+
+def send_cooldown_mode_message():
+    """Send cooldown mode message when 3 consecutive rounds < 1.20x detected."""
+    send_message(COOLDOWN_MODE_TEXT)
 
 
 # ============================================================
 # TEMPLATE 2: Pre-Signal + (legacy) Pattern Monitoring
 # ============================================================
-def send_pre_signal_analyzing():
-    """Send Pre-Signal (Template 2): 'Analisando...' before a possible signal.
-    Returns tuple (primary_msg_id, secondary_msg_id) so caller can delete both if 'Sinal cancelado' is not posted (governance)."""
-    text = """⚠️ Analisando... ⚠️
+PRE_SIGNAL_TEXT = """⚠️ Analisando... ⚠️
 
 Padrão identificado. Aguarde o sinal."""
-    return send_message_with_both_ids(text)
 
-
-def send_signal_cancelled():
-    """Send Signal Cancelled template when post-pre-signal round breaks the pattern (> 2.0x)."""
-    text = """🚫 Sinal cancelado.
+SIGNAL_CANCELLED_TEXT = """🚫 Sinal cancelado.
 
 Condições de entrada mudaram. 
 Algoritmo protegendo sua banca. 🛡️
 
 Aguardando próxima oportunidade..."""
-    send_message(text)
+
+
+def send_pre_signal_analyzing():
+    """Send Pre-Signal (Template 2): 'Analisando...' before a possible signal.
+    Returns tuple (primary_msg_id, secondary_msg_id) so caller can delete both if 'Sinal cancelado' is not posted (governance)."""
+    return send_message_with_both_ids(PRE_SIGNAL_TEXT)
+
+
+def send_signal_cancelled():
+    """Send Signal Cancelled template when post-pre-signal round breaks the pattern (> 2.0x)."""
+    send_message(SIGNAL_CANCELLED_TEXT)
 
 
 def send_pattern_monitoring(count, remaining):
     """(Optional / legacy) Pattern monitoring message. Currently not used for V2 flow."""
-    emoji = random.choice(ANALYSIS_EMOJIS)
-    text = f"""⚠️ Analisando... ⚠️
-
-Padrão identificado. Aguarde o sinal."""
-    send_message(text)
+    send_message(PRE_SIGNAL_TEXT)
 
 
 # ============================================================
@@ -401,7 +457,7 @@ def send_signal(last_round, target):
     # In V2 we focus on target/protection/gale max, not last_round text.
     target_multiplier = target
     protection_multiplier = 2.00  # can be adjusted later if a distinct protection level is introduced
-    gale_max = getattr(config, "MAX_GALE", 2)
+    gale_max = getattr(config, "MAX_GALE", 2)  # read per send so it follows signal_engine.refresh_config()
 
     text = f"""🚀 SINAL CONFIRMADO 🚀
 
@@ -409,7 +465,7 @@ def send_signal(last_round, target):
 🛡️ Proteção: {protection_multiplier}x
 🔄 Gale Máx: {gale_max}
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     return send_message_with_both_ids(text)
 
 
@@ -425,36 +481,40 @@ def send_win_result(result, target, today_wins, today_losses, reply_to_message_i
     except (TypeError, ValueError):
         is_big_win = False
     if is_big_win:
-        emoji = random.choice(WIN_EMOJIS)
+        emoji = _rng.choice(WIN_EMOJIS)
         text = f"""✅ 🔥 GREEEEEN GIGANTE! 🔥 ✅
 
 Lucro MASSIVO garantido! {emoji}
 
 Quem seguiu, lucrou! 💎
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     else:
-        emoji = random.choice(WIN_EMOJIS)
-        phrase = random.choice(WIN_PHRASES)
+        emoji = _rng.choice(WIN_EMOJIS)
+        phrase = _rng.choice(WIN_PHRASES)
         text = f"""✅ GREEEEEN! {emoji}
 
 {phrase}
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
 
 
 # ============================================================
 # TEMPLATE 5: Gale 1 Trigger
 # ============================================================
-def send_gale1_trigger(result, target, reply_to_message_id=None, reply_to_message_id_2=None):
-    """Send gale 1 warning message (V2 style). Random Alert emoji."""
-    emoji = random.choice(ALERT_EMOJIS)
-    text = f"""{emoji} GALE 1 {emoji}
+# Only the alert emoji varies; the affiliate anchor is appended after format() so braces in the link are safe
+_GALE_TEMPLATE = """{emoji} GALE {depth} {emoji}
 
 Dobre a aposta! Entrada de recuperação.
 
-{_link_button()}"""
+"""
+
+
+def send_gale1_trigger(result, target, reply_to_message_id=None, reply_to_message_id_2=None):
+    """Send gale 1 warning message (V2 style). Random Alert emoji."""
+    emoji = _rng.choice(ALERT_EMOJIS)
+    text = _GALE_TEMPLATE.format(emoji=emoji, depth=1) + _LINK_BUTTON
     send_message(text, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
 
 
@@ -463,12 +523,8 @@ Dobre a aposta! Entrada de recuperação.
 # ============================================================
 def send_gale2_trigger(result, target, reply_to_message_id=None, reply_to_message_id_2=None):
     """Send gale 2 warning message (V2 style). Random Alert emoji."""
-    emoji = random.choice(ALERT_EMOJIS)
-    text = f"""{emoji} GALE 2 {emoji}
-
-Dobre a aposta! Entrada de recuperação.
-
-{_link_button()}"""
+    emoji = _rng.choice(ALERT_EMOJIS)
+    text = _GALE_TEMPLATE.format(emoji=emoji, depth=2) + _LINK_BUTTON
     send_message(text, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
 
 
@@ -484,31 +540,29 @@ def send_gale_recovery(gale_depth, result, target, today_wins, today_losses, rep
     except (TypeError, ValueError):
         is_big_win = False
     if is_big_win:
-        emoji = random.choice(WIN_EMOJIS)
+        emoji = _rng.choice(WIN_EMOJIS)
         text = f"""✅ 🔥 GREEEEEN GIGANTE! 🔥 ✅
 
 Lucro MASSIVO garantido! {emoji}
 
 Recuperamos no GALE {gale_depth}! Quem seguiu, lucrou! 💎
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     else:
-        emoji = random.choice(WIN_EMOJIS)
-        phrase = random.choice(WIN_PHRASES)
+        emoji = _rng.choice(WIN_EMOJIS)
+        phrase = _rng.choice(WIN_PHRASES)
         text = f"""✅ GREEEEEN! {emoji}
 
 Recuperamos no GALE {gale_depth}! {phrase}
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
 
 
 # ============================================================
 # TEMPLATE 8: Loss (Gale 2 Failed)
 # ============================================================
-def send_loss_message_telegram(result, today_wins, today_losses, reply_to_message_id=None, reply_to_message_id_2=None):
-    """Send loss message (gale 2 failed). Optional reply threading."""
-    text = f"""🛑 STOP LOSS ATIVADO 🛑
+_LOSS_TEXT = f"""🛑 STOP LOSS ATIVADO 🛑
 
 Volatilidade detectada no mercado.
 
@@ -516,8 +570,12 @@ Pausando para proteger sua banca. 🛡️
 
 Aguardando entrada segura...
 
-{_link_button()}"""
-    send_message(text, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
+{_LINK_BUTTON}"""
+
+
+def send_loss_message_telegram(result, today_wins, today_losses, reply_to_message_id=None, reply_to_message_id_2=None):
+    """Send loss message (gale 2 failed). Optional reply threading."""
+    send_message(_LOSS_TEXT, reply_to_message_id=reply_to_message_id, reply_to_message_id_2=reply_to_message_id_2)
 
 
 # ============================================================
@@ -554,7 +612,7 @@ def send_session_summary(session_duration, total_signals, wins, losses, win_rate
 
 {performance_message}
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
@@ -579,7 +637,7 @@ Ativa a notificação pra não perder! 🔔
 
 Descansa e até amanhã 💪
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
@@ -602,26 +660,29 @@ def send_midday_recap(result_emojis, wins, losses, best_streak):
 
 Ainda temos a tarde toda! Bora time 💪
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
 # ============================================================
 # RECAP: End of Day
 # ============================================================
+# Win-rate tiers: below 65, 65+, 75+, 85+ (a rate equal to a threshold falls in the higher tier)
+_EOD_PERFORMANCE_THRESHOLDS = (65, 75, 85)
+_EOD_PERFORMANCE_MESSAGES = (
+    "Dia difícil. Faz parte. Amanhã voltamos mais fortes. 🔄",
+    "Dia ok. Alguns Gales pesados mas recuperamos. 👊",
+    "Dia sólido time! Consistência é o que paga. 💪",
+    "DIA INCRÍVEL! Quem seguiu os sinais tá sorrindo! 🤑",
+)
+
+
 def send_end_of_day_recap(result_emojis, wins, losses, best_streak, total_signals):
     """Send end of day recap (22:30 BRT, before daily close)."""
     total = wins + losses
     win_rate = (wins / total * 100) if total > 0 else 0
 
-    if win_rate >= 85:
-        performance_message = "DIA INCRÍVEL! Quem seguiu os sinais tá sorrindo! 🤑"
-    elif win_rate >= 75:
-        performance_message = "Dia sólido time! Consistência é o que paga. 💪"
-    elif win_rate >= 65:
-        performance_message = "Dia ok. Alguns Gales pesados mas recuperamos. 👊"
-    else:
-        performance_message = "Dia difícil. Faz parte. Amanhã voltamos mais fortes. 🔄"
+    performance_message = _EOD_PERFORMANCE_MESSAGES[bisect_right(_EOD_PERFORMANCE_THRESHOLDS, win_rate)]
 
     text = f"""📊 RESULTADO DO DIA
 
@@ -642,13 +703,16 @@ def send_end_of_day_recap(result_emojis, wins, losses, best_streak, total_signal
 
 Voltamos amanhã às 8h! 🚀
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
 # ============================================================
 # RECAP: Weekly
 # ============================================================
+_WEEKLY_DAY_LINE = "{day}:  {wins}✅ {losses}🛑 ({rate:.0f}%)".format
+
+
 def send_weekly_recap(daily_data, week_wins, week_losses, week_total_signals, best_day, best_day_rate):
     """
     Send weekly recap (Sunday 21:00 BRT).
@@ -657,15 +721,7 @@ def send_weekly_recap(daily_data, week_wins, week_losses, week_total_signals, be
     total = week_wins + week_losses
     week_rate = (week_wins / total * 100) if total > 0 else 0
 
-    daily_lines = []
-    for day_data in daily_data:
-        day_name = day_data['day']
-        wins = day_data['wins']
-        losses = day_data['losses']
-        rate = day_data['rate']
-        daily_lines.append(f"{day_name}:  {wins}✅ {losses}🛑 ({rate:.0f}%)")
-
-    daily_str = "\n".join(daily_lines)
+    daily_str = "\n".join(_WEEKLY_DAY_LINE(**day_data) for day_data in daily_data)
 
     text = f"""📊 RESUMO DA SEMANA
 
@@ -687,51 +743,53 @@ def send_weekly_recap(daily_data, week_wins, week_losses, week_total_signals, be
 
 Semana que vem tem mais! Bora time 🚀
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)
 
 
 # ============================================================
 # STREAK ALERTS (3, 5, 7, 10, 15, 20, 25... consecutive wins)
 # ============================================================
-def send_streak_celebration(streak):
-    """Send streak alert at milestones 3, 5, 7, 10, then every 5. NEVER mention loss streaks."""
-    if streak == 3:
-        text = f"""SEQUÊNCIA DE 3 GREENS! 🔥
+# Fixed milestone texts; 15, 20, 25... use the fallback in send_streak_celebration
+_STREAK_TEXTS = {
+    3: f"""SEQUÊNCIA DE 3 GREENS! 🔥
 
 Algoritmo em alta! Não perca o próximo sinal! 📈
 
-{_link_button()}"""
-    elif streak == 5:
-        text = f"""🔥🔥🔥 SEQUÊNCIA DE 5 GREENS! 🔥🔥🔥
+{_LINK_BUTTON}""",
+    5: f"""🔥🔥🔥 SEQUÊNCIA DE 5 GREENS! 🔥🔥🔥
 
 O ALGORITMO ESTÁ ON FIRE! 🚀
 
 Quem está seguindo, está lucrando! 💎💰
 
-{_link_button()}"""
-    elif streak == 7:
-        text = f"""🚀🚀 SEQUÊNCIA DE 7 GREENS! 🚀🚀
+{_LINK_BUTTON}""",
+    7: f"""🚀🚀 SEQUÊNCIA DE 7 GREENS! 🚀🚀
 
 INCRÍVEL! O algoritmo não para! 💎
 
 Bora continuar! Quem tá junto tá lucrando! 📈💰
 
-{_link_button()}"""
-    elif streak == 10:
-        text = f"""🔥🔥🔥 SEQUÊNCIA DE 10 GREENS! 🔥🔥🔥
+{_LINK_BUTTON}""",
+    10: f"""🔥🔥🔥 SEQUÊNCIA DE 10 GREENS! 🔥🔥🔥
 
 HISTÓRICO! O algoritmo está imparável! 🚀💎
 
 Quem está seguindo está lucrando! Não perca o próximo sinal! 💰
 
-{_link_button()}"""
-    else:  # 15, 20, 25, 30...
+{_LINK_BUTTON}""",
+}
+
+
+def send_streak_celebration(streak):
+    """Send streak alert at milestones 3, 5, 7, 10, then every 5. NEVER mention loss streaks."""
+    text = _STREAK_TEXTS.get(streak)
+    if text is None:  # 15, 20, 25, 30...
         text = f"""🔥🔥🔥 SEQUÊNCIA DE {streak} GREENS! 🔥🔥🔥
 
 O ALGORITMO ESTÁ ON FIRE! 🚀
 
 Quem está seguindo, está lucrando! 💎💰
 
-{_link_button()}"""
+{_LINK_BUTTON}"""
     send_message(text)